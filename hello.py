@@ -1,42 +1,273 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import asynccontextmanager
 import os
 from atlassian import Jira
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-import drawsvg as draw
 import calendar
-from datetime import date, datetime, time, timedelta
-from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import Response, HTMLResponse
+from datetime import date
+from fastapi import FastAPI, Header, Query, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
 from typing import Annotated
+from xml.sax.saxutils import escape as xml_escape
+from collections import defaultdict
+from itertools import accumulate
+from bisect import bisect_right
 import hmac
 import hashlib
+import functools
 import math
+import threading
+import time
 from vacation_optimizer import (
-    find_vacation_grid, create_vacation_grid_html,
-    find_periods_for_cell, create_vacation_cell_detail_html,
+    find_vacation_grid, iter_vacation_grid_html,
+    find_periods_for_cell, iter_vacation_cell_detail_html,
     find_top_opportunities
 )
 
 cache_duration = 5  # Default is 5 minutes
+past_cache_duration = 24 * 60  # Past months rarely change; default is one day
 secret_key = "default-secret-key-change-me"
+# Hash states already keyed with secret_key; copied per request so the key is
+# encoded and mixed in only once
+hmac_template = None
+blake2b_template = None
 jira_url = "invalid-url"
 jira_api_token = "invalid-token"
 jira = None
+# Shared pool for running independent blocking Jira requests concurrently. The Jira
+# client's connection pool is sized to match so every worker can keep its connection
+# alive instead of redoing the TCP/TLS handshake.
+JIRA_CONCURRENCY = 8
+jira_executor = ThreadPoolExecutor(max_workers=JIRA_CONCURRENCY, thread_name_prefix="jira")
+
+
+class TTLCache:
+    """
+    Small thread-safe cache whose entries expire cache_duration minutes after they
+    were stored. Holds at most `maxsize` entries, evicting the oldest first.
+    Concurrent misses on the same key share one fetch: the first caller runs it and
+    the others wait for its result, so overlapping requests don't hit Jira twice.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = {}
+        self._pending: dict[object, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key, fetch):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if time.monotonic() - stored_at < cache_duration * 60:
+                    return value
+                del self._entries[key]
+            pending = self._pending.get(key)
+            is_owner = pending is None
+            if is_owner:
+                pending = self._pending[key] = Future()
+
+        if not is_owner:
+            return pending.result()
 
-svg_cache = {}
-required_times_cache = {}
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            # Re-insert so dict order stays oldest-first for eviction
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic())
+            if len(self._entries) > self.maxsize:
+                del self._entries[next(iter(self._entries))]
+        pending.set_result(value)
+        return value
+
+
+# Day types per (user, year); ranges are sliced out locally
+required_times_cache = TTLCache(maxsize=256)
+# Raw worklogs per (user, year, quarter); months are sliced out locally
+worklog_range_cache = TTLCache(maxsize=256)
+
+# The calendar SVG is assembled as a list of markup strings; these are the repeated
+# elements, filled in with str.format
+SVG_OPEN_TMPL = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"\n'
+    '     width="{width}" height="{height}" viewBox="0 0 {width} {height}" font-family="Arial">'
+)
+RECT_TMPL = '<rect x="{x}" y="{y}" width="{width}" height="{height}" fill="{fill}" stroke="{stroke}" />'
+# Same-coloured boxes (graph bars, calendar cell backgrounds) are merged into one
+# <path> per colour, each box being a "M x y h w v h h -w Z" subpath
+BOX_SUBPATH_TMPL = "M{x} {y}h{width}v{height}h-{width}Z"
+LINE_TMPL = '<line x1="{x1}" y1="{y}" x2="{x2}" y2="{y}" stroke="{stroke}" stroke-width="{stroke_width}" />'
+TEXT_TMPL = '<text x="{x}" y="{y}" font-size="{size}">{text}</text>'
+ANCHORED_TEXT_TMPL = '<text x="{x}" y="{y}" font-size="{size}" text-anchor="{anchor}">{text}</text>'
+
+
+def _fmt(value: float) -> str:
+    """Format an SVG coordinate with at most one decimal and no trailing ".0"."""
+    return f"{value:.1f}".rstrip("0").rstrip(".")
+
+
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# Calendar layout: a stats card and a daily-hours graph side by side above the
+# 7-column month grid
+CELL_WIDTH = 80
+CELL_HEIGHT = 65
+PADDING = 8
+STATS_Y = PADDING + 35
+CARD_HEIGHT = 85
+GRAPH_X = 2 * PADDING + CELL_WIDTH * 4 + PADDING * 2
+GRAPH_Y = STATS_Y
+GRAPH_WIDTH = CELL_WIDTH * 3 - PADDING * 3
+GRAPH_HEIGHT = CARD_HEIGHT + PADDING
+GRAPH_MAX_HOURS = 10
+GRAPH_GRID_STEPS = 5
+CALENDAR_START_Y = STATS_Y + CARD_HEIGHT + PADDING + 30
+
+def _build_static_frame() -> str:
+    """
+    Everything in the calendar SVG that does not depend on the request: the prologue,
+    the stats card and graph frames, the graph's hour grid with its labels and the
+    weekday headers.
+    """
+    parts = [
+        SVG_OPEN_TMPL.format(
+            width=CELL_WIDTH * 7 + PADDING * 2,
+            height=CELL_HEIGHT * 6 + PADDING * 2 + 60 + 100,
+        ),
+        RECT_TMPL.format(
+            x=PADDING, y=STATS_Y, width=CELL_WIDTH * 4, height=CARD_HEIGHT + PADDING,
+            fill="white", stroke="black",
+        ),
+        RECT_TMPL.format(
+            x=GRAPH_X, y=GRAPH_Y, width=GRAPH_WIDTH, height=GRAPH_HEIGHT, fill="white", stroke="black"
+        ),
+    ]
+    for i in range(GRAPH_GRID_STEPS + 1):
+        y_pos = _fmt(GRAPH_Y + GRAPH_HEIGHT - (i * GRAPH_HEIGHT / GRAPH_GRID_STEPS))
+        hours = i * GRAPH_MAX_HOURS / GRAPH_GRID_STEPS
+        parts.append(LINE_TMPL.format(x1=GRAPH_X, x2=GRAPH_X + GRAPH_WIDTH, y=y_pos, stroke="#CCCCCC", stroke_width=0.5))
+        parts.append(ANCHORED_TEXT_TMPL.format(x=GRAPH_X - 2, y=y_pos, size=8, anchor="end", text=f"{int(hours)}h"))
+    for i, day in enumerate(WEEKDAY_NAMES):
+        parts.append(
+            ANCHORED_TEXT_TMPL.format(
+                x=_fmt(PADDING + i * CELL_WIDTH + CELL_WIDTH / 2), y=CALENDAR_START_Y, size=14, anchor="middle", text=day
+            )
+        )
+    return "\n".join(parts)
+
+
+STATIC_FRAME = _build_static_frame()
+# One row of the stats card: label on the left, value right-aligned
+STATS_ROW_TMPL = (
+    TEXT_TMPL.format(x=PADDING + 16, y="{row_y}", size=12, text="{label}")
+    + "\n"
+    + ANCHORED_TEXT_TMPL.format(x=PADDING + CELL_WIDTH * 4 - 12, y="{row_y}", size=12, anchor="end", text="{value}")
+)
+
+# Day-cell icons. Each is emitted once into the SVG <defs> and referenced from every
+# affected cell with <use>, instead of repeating the full path data per cell.
+SICK_ICON = (
+    '<g id="sick-icon" transform="scale(0.67)">'  # 16/24 to scale from 24x24 to 16x16
+    + "".join(
+        f'<path d="{path_data}" fill="#9575CD" />'
+        for path_data in (
+            "M16.3188 4.39811C16.2142 4.63431 16.1229 4.86707 16.0449 5.0964C14.8581 4.39956 13.4757 4 12 4C8.26861 4 5.13388 6.55463 4.24939 10.0103C3.32522 10.0868 2.51988 10.5821 2.02371 11.306C2.38011 6.10691 6.71045 2 12 2C13.7733 2 15.4388 2.46156 16.8829 3.27111C16.6426 3.71554 16.4546 4.09121 16.3188 4.39811Z",
+            "M16.6694 9.62311C16.782 9.7483 16.8987 9.86257 17.0193 9.96593C16.9678 9.9932 16.915 10.0195 16.8609 10.0447C16.35 10.2824 15.6778 10.438 14.9463 10.242C14.2147 10.046 13.7104 9.57517 13.3868 9.11381C13.0676 8.65868 12.8921 8.16974 12.8252 7.82758L14.2973 7.53961C14.3274 7.69373 14.4264 7.98373 14.6149 8.25248C14.799 8.51501 15.0357 8.71304 15.3345 8.7931C15.5814 8.85925 15.8319 8.83445 16.0755 8.7475C16.2274 9.06007 16.4253 9.35194 16.6694 9.62311Z",
+            "M12 22C7.62613 22 3.90811 19.1919 2.55043 15.2802C3.07478 15.729 3.75574 16 4.50001 16C4.68514 16 4.86636 15.9832 5.04222 15.9511C6.41837 18.3693 9.01875 20 12 20C16.4183 20 20 16.4183 20 12C20 11.5146 19.9568 11.0392 19.8739 10.5776C20.4168 10.4171 20.9024 10.0989 21.3306 9.62311C21.4357 9.50632 21.5323 9.38569 21.6203 9.26122C21.8676 10.1316 22 11.0503 22 12C22 17.5228 17.5229 22 12 22Z",
+            "M9.70411 7.53961C9.67396 7.69373 9.57502 7.98373 9.38652 8.25248C9.20239 8.51501 8.96567 8.71304 8.66689 8.7931C8.36811 8.87315 8.0641 8.82001 7.77337 8.68472C7.47575 8.54623 7.24507 8.34455 7.1419 8.22615L6.01101 9.21159C6.24005 9.47444 6.63649 9.81014 7.14052 10.0447C7.65143 10.2824 8.32358 10.438 9.05512 10.242C9.78666 10.046 10.291 9.57517 10.6146 9.11381C10.9338 8.65868 11.1093 8.16974 11.1762 7.82758L9.70411 7.53961Z",
+            "M8.99481 13.4947C9.79184 12.6977 10.8728 12.2499 12 12.2499C13.1272 12.2499 14.2082 12.6977 15.0052 13.4947C15.8022 14.2917 16.25 15.3727 16.25 16.4999V17.2499H7.75001V16.4999C7.75001 16.2383 7.77413 15.9792 7.82113 15.7256L5.5016 14.7315C5.20706 14.9023 4.86495 15 4.5 15C3.39543 15 2.5 14.1046 2.5 13C2.5 11.8954 3.39543 11 4.5 11C5.59904 11 6.49103 11.8865 6.49993 12.9834L8.63815 13.8998C8.74775 13.7581 8.86677 13.6227 8.99481 13.4947ZM11.9683 15.7499C11.8933 15.4605 11.6899 15.2077 11.3939 15.0809L10.0896 14.5218C10.6018 14.0271 11.2866 13.7499 12 13.7499C12.7294 13.7499 13.4288 14.0396 13.9446 14.5554C14.2793 14.8901 14.5189 15.3024 14.6458 15.7499H11.9683Z",
+            "M19 9C18.45 9 17.9792 8.80417 17.5875 8.4125C17.1958 8.02083 17 7.55 17 7C17 6.55 17.125 6.07083 17.375 5.5625C17.625 5.05417 18.1667 4.2 19 3C19.8333 4.2 20.375 5.05417 20.625 5.5625C20.875 6.07083 21 6.55 21 7C21 7.55 20.8042 8.02083 20.4125 8.4125C20.0208 8.80417 19.55 9 19 9Z",
+        )
+    )
+    + "</g>"
+)
+# Overtime star: a 5-pointed star of size STAR_SIZE centred on the origin, alternating
+# outer (radius size/2) and inner (radius size/4) points from the top point
+STAR_SIZE = 8
+STAR_ICON = '<path id="star" d="M {} Z" fill="#2E7D32" />'.format(" L ".join(
+    f"{_fmt(radius * math.cos(math.radians(angle)))},{_fmt(radius * math.sin(math.radians(angle)))}"
+    for j in range(5)
+    for angle, radius in ((-90 + j * 72, STAR_SIZE / 2), (-90 + j * 72 + 36, STAR_SIZE / 4))
+))
+HOLIDAY_ICON = (
+    '<g id="holiday-icon" transform="scale(0.33)">'  # 16/48 to scale from 48x48 to 16x16
+    + "".join(
+        f'<path d="{path_data}" stroke="#1976D2" stroke-width="4" stroke-linecap="round" stroke-linejoin="round" fill="none" />'
+        for path_data in (
+            "M4 24H7",
+            "M10 10L12 12",
+            "M24 4V7",
+            "M14 24C14 18.4776 18.4776 14 24 14C29.5224 14 34 18.4776 34 24C34 27.3674 32.3357 30.3458 29.785 32.1578",
+            "M38 10L36 12",
+            "M44 24L41 24",
+            "M37.9814 37.982L36.3614 36.362",
+            "M23.4999 28C20.4999 28 14 28.2 14 31C14 33.8 18.6058 33.7908 20.9998 34C23 34.1747 26.4624 35.6879 25.9999 38C24.9998 43 8.99982 42 4.99994 42",
+        )
+    )
+    + "</g>"
+)
 
 
-def _is_cache_fresh(cached_at: datetime) -> bool:
-    return cached_at > datetime.now() - timedelta(minutes=cache_duration)
+# Graph bar colours for worked hours: under MIN_BAR_HOURS (red), under target (orange),
+# on target within TARGET_MARGIN_HOURS (blue), over target (green) and MAX_BAR_HOURS or
+# more (purple). bisect_right over the thresholds picks the level without a comparison
+# chain.
+MIN_BAR_HOURS = 4
+MAX_BAR_HOURS = 10
+TARGET_MARGIN_HOURS = 5 / 60
+BAR_LEVEL_COLORS = ("#C62828", "#EF6C00", "#1976D2", "#2E7D32", "#9C27B0")
+ON_TARGET_LEVEL = 2
 
 
-def _get_required_times_cached(from_date: str, to_date: str, user_name: str) -> dict[str, str]:
-    cache_key = f"{from_date}:{to_date}:{user_name}"
-    cached = required_times_cache.get(cache_key)
-    if cached and _is_cache_fresh(cached["timestamp"]):
-        return cached["day_types"]
+def draw_stars(parts: list[str], x: int, y: int, count: int, cell_width: int) -> None:
+    for i in range(min(count, 5)):  # Limit to 5 stars maximum
+        star_x = x + cell_width - (STAR_SIZE + 2) * (i + 1)
+        star_y = y + STAR_SIZE + 2
+        parts.append(f'<use xlink:href="#star" x="{star_x}" y="{star_y}" />')
+
+
+def draw_sickness_icon(parts: list[str], x: int, y: int, cell_width: int) -> None:
+    # Position the icon on the right side of the cell, at the same height as hours
+    icon_x = x + cell_width - 32  # 32 pixels from right edge
+    icon_y = y + 24  # Align with hours text
+    parts.append(f'<use xlink:href="#sick-icon" x="{icon_x}" y="{icon_y}" />')
+
 
+def draw_holiday_icon(parts: list[str], x: int, y: int, cell_width: int) -> None:
+    # Position the icon on the right side of the cell, at the same height as hours
+    icon_x = x + cell_width - 32  # 32 pixels from right edge
+    icon_y = y + 24  # Align with hours text
+    parts.append(f'<use xlink:href="#holiday-icon" x="{icon_x}" y="{icon_y}" />')
+
+
+def _get_year_required_times(user_name: str, year: int) -> dict[str, str]:
+    return required_times_cache.get_or_fetch(
+        (user_name, year), lambda: _fetch_required_times(f"{year}-01-01", f"{year}-12-31", user_name)
+    )
+
+
+def _get_year_start_required_times(user_name: str, to_date: str) -> dict[str, str]:
+    """Day types from January 1st of to_date's year through to_date, cached on their own."""
+    from_date = f"{to_date[:4]}-01-01"
+    return required_times_cache.get_or_fetch(
+        (user_name, from_date, to_date), lambda: _fetch_required_times(from_date, to_date, user_name)
+    )
+
+
+def _fetch_required_times(from_date: str, to_date: str, user_name: str) -> dict[str, str]:
     required_times = jira.tempo_timesheets_get_required_times(
         from_date=from_date, to_date=to_date, user_name=user_name
     )
@@ -49,19 +280,112 @@ def _get_required_times_cached(from_date: str, to_date: str, user_name: str) ->
         if isinstance(required_times, list)
         else {}
     )
-    required_times_cache[cache_key] = {
-        "day_types": day_types,
-        "timestamp": datetime.now(),
-    }
     return day_types
 
+
+def _get_required_times_cached(from_date: str, to_date: str, user_name: str) -> dict[str, str]:
+    """
+    Day types between two dates (inclusive). Jira is queried once per user and
+    calendar year and the result sliced here, so month views, the prior-months
+    range and the vacation planner all share the same requests. A range that only
+    spills into the start of a later year (the vacation planner's early-January
+    lookahead) fetches just that slice instead of the whole later year.
+    """
+    first_year = int(from_date[:4])
+    last_year = int(to_date[:4])
+    # Later years are fetched on the Jira pool while this thread fetches the first one.
+    # Only the request-thread callers pass multi-year ranges, so this never waits on
+    # the pool from inside it.
+    later_years = [
+        jira_executor.submit(_get_year_required_times, user_name, year)
+        if year < last_year
+        else jira_executor.submit(_get_year_start_required_times, user_name, to_date)
+        for year in range(first_year + 1, last_year + 1)
+    ]
+    years_types = [_get_year_required_times(user_name, first_year)]
+    years_types.extend(future.result() for future in later_years)
+
+    day_types = {}
+    for year_types in years_types:
+        day_types.update(
+            (date_str, day_type)
+            for date_str, day_type in year_types.items()
+            if from_date <= date_str <= to_date
+        )
+    return day_types
+
+
+def _get_quarter_worklogs(user_name: str, year: int, quarter: int) -> list:
+    return worklog_range_cache.get_or_fetch(
+        (user_name, year, quarter), lambda: _fetch_quarter_worklogs(user_name, year, quarter)
+    )
+
+
+def _fetch_quarter_worklogs(user_name: str, year: int, quarter: int) -> list:
+    first_month = 3 * quarter - 2
+    last_month = first_month + 2
+    worklogs = jira.tempo_timesheets_get_worklogs(
+        date_from=_month_day_strs(year, first_month)[0],
+        date_to=_month_day_strs(year, last_month)[-1],
+        username=user_name,
+    )
+    if not isinstance(worklogs, list):
+        worklogs = []
+    return worklogs
+
+
+def _get_worklogs_cached(from_date: str, to_date: str, user_name: str) -> list:
+    """
+    Worklogs between two dates (inclusive) of the same year. Jira is queried once
+    per calendar quarter and the result filtered here, so neighbouring months and
+    the prior-months range share the same requests.
+    """
+    year = int(from_date[:4])
+    first_quarter = (int(from_date[5:7]) - 1) // 3 + 1
+    last_quarter = (int(to_date[5:7]) - 1) // 3 + 1
+    return [
+        worklog
+        for quarter in range(first_quarter, last_quarter + 1)
+        for worklog in _get_quarter_worklogs(user_name, year, quarter)
+        if isinstance(worklog, dict)
+        and from_date <= (worklog.get("dateStarted") or "")[:10] <= to_date
+    ]
+
+
+# The calendar module recomputes these pure (year, month) lookups on every call
+@functools.lru_cache(maxsize=256)
+def _monthrange(year: int, month: int) -> tuple[int, int]:
+    return calendar.monthrange(year, month)
+
+
+@functools.lru_cache(maxsize=256)
+def _monthcalendar(year: int, month: int) -> tuple[tuple[int, ...], ...]:
+    return tuple(tuple(week) for week in calendar.monthcalendar(year, month))
+
+
+@functools.lru_cache(maxsize=256)
+def _month_day_strs(year: int, month: int) -> tuple[str, ...]:
+    """ISO date string of every day of the month, indexed by day - 1."""
+    month_prefix = f"{year}-{month:02d}-"
+    return tuple(f"{month_prefix}{day:02d}" for day in range(1, _monthrange(year, month)[1] + 1))
+
+
+@functools.lru_cache(maxsize=12)
+def _month_name(month: int) -> str:
+    return calendar.month_name[month]
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Fills in only variables not already set in the environment
     load_dotenv()
     global cache_duration
     cache_duration = int(os.getenv("CACHE_DURATION", cache_duration))
+    global past_cache_duration
+    past_cache_duration = int(os.getenv("PAST_CACHE_DURATION", past_cache_duration))
     global secret_key
     secret_key = os.getenv("HASH_SECRET_KEY", secret_key)
+    _init_request_hashing()
 
     global jira_url
     jira_url = os.getenv("JIRA_URL")
@@ -70,68 +394,123 @@ async def lifespan(app: FastAPI):
     if not jira_url or not jira_api_token:
         raise ValueError("JIRA_URL or JIRA_API_TOKEN is not set")
 
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=JIRA_CONCURRENCY)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     global jira
-    jira = Jira(jira_url, token=jira_api_token)
+    jira = Jira(jira_url, token=jira_api_token, session=session)
 
-    try:
-        jira.myself()
-    except Exception as e:
-        raise ValueError(f"Failed to authenticate with Jira: {str(e)}")
+    # The credentials probe costs a Jira round-trip on every (re)start
+    if os.getenv("SKIP_JIRA_PROBE") != "1":
+        try:
+            jira.myself()
+        except Exception as e:
+            raise ValueError(f"Failed to authenticate with Jira: {str(e)}")
 
     yield
 
 app = FastAPI(lifespan=lifespan)
-
+# SVG and HTML responses are verbose text and compress very well
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+# Issue summaries Tempo uses for annual leave and sick leave worklogs
+VACATION_SUMMARY_PREFIX = "Letni dopust"
+SICK_LEAVE_SUMMARY_PREFIX = "Bolniška odsotnost"
+LEAVE_SUMMARY_PREFIXES = (VACATION_SUMMARY_PREFIX, SICK_LEAVE_SUMMARY_PREFIX)
+
+# Request hashes come in two formats, told apart by length: the original 64-char
+# HMAC-SHA256 and the shorter, cheaper 32-char keyed BLAKE2b.
+REQUEST_HASH_DIGEST_SIZE = 16
+REQUEST_HASH_LENGTH = 2 * REQUEST_HASH_DIGEST_SIZE
+LEGACY_HASH_LENGTH = 64
+HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+def _init_request_hashing() -> None:
+    global hmac_template, blake2b_template
+    key = secret_key.encode('utf-8')
+    hmac_template = hmac.new(key, digestmod=hashlib.sha256)
+    # BLAKE2b keys are limited to 64 bytes; longer secrets are hashed down first
+    if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    blake2b_template = hashlib.blake2b(key=key, digest_size=REQUEST_HASH_DIGEST_SIZE)
+    # Both hash functions are memoized and must not serve hashes of an old key
+    generate_request_hash.cache_clear()
+    generate_legacy_request_hash.cache_clear()
+
+
+@functools.lru_cache(maxsize=4096)
 def generate_request_hash(year: int, month: int, username: str) -> str:
-    message = f"{year}-{month}-{username}".encode('utf-8')
-    h = hmac.new(secret_key.encode('utf-8'), message, hashlib.sha256)
+    h = blake2b_template.copy()
+    h.update(f"{year}-{month}-{username}".encode('utf-8'))
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=4096)
+def generate_legacy_request_hash(year: int, month: int, username: str) -> str:
+    h = hmac_template.copy()
+    h.update(f"{year}-{month}-{username}".encode('utf-8'))
     return h.hexdigest()
 
+
+def verify_request_hash(hash: str, year: int, month: int, username: str) -> bool:
+    # Anything that is not a hex digest of either length can never match; reject it
+    # before computing (and caching) a hash for the request
+    if len(hash) == LEGACY_HASH_LENGTH:
+        hash_function = generate_legacy_request_hash
+    elif len(hash) == REQUEST_HASH_LENGTH:
+        hash_function = generate_request_hash
+    else:
+        return False
+    if not HEX_DIGITS.issuperset(hash):
+        return False
+    expected_hash = hash_function(year, month, username)
+    return hmac.compare_digest(hash, expected_hash)
+
+
+_init_request_hashing()
+
+
 def process_worklogs(worklogs, daily_hours: float) -> tuple[dict, set, set]:
     """Parse worklogs into worked_time dict, dopust_days set, and sick_days set."""
-    worked_time = {}
+    worked_time = defaultdict(float)
     dopust_days = set()
     sick_days = set()
 
-    if worklogs and isinstance(worklogs, list):
-        for worklog in worklogs:
-            if (
-                isinstance(worklog, dict)
-                and "dateStarted" in worklog
-                and "timeSpentSeconds" in worklog
-            ):
-                extracted_date = worklog.get("dateStarted", "").split("T")[0]
-                if (
-                    "issue" in worklog
-                    and isinstance(worklog["issue"], dict)
-                    and "summary" in worklog["issue"]
-                ):
-                    summary = worklog["issue"]["summary"]
-                    if summary.startswith("Letni dopust"):
-                        time_spent = daily_hours * 3600
-                        dopust_days.add(extracted_date)
-                    elif summary.startswith("Bolniška odsotnost"):
-                        time_spent = worklog.get("timeSpentSeconds", 0)
-                        factor_of_time_to_remove = (time_spent / 8) * 0.5
-                        time_spent = time_spent - factor_of_time_to_remove
-                        sick_days.add(extracted_date)
-                    else:
-                        time_spent = worklog.get("timeSpentSeconds", 0)
-                else:
-                    time_spent = worklog.get("timeSpentSeconds", 0)
-                if extracted_date:
-                    worked_time[extracted_date] = (
-                        worked_time.get(extracted_date, 0) + time_spent
-                    )
+    if not worklogs or not isinstance(worklogs, list):
+        return {}, dopust_days, sick_days
+
+    vacation_seconds = daily_hours * 3600
+    for worklog in worklogs:
+        if not isinstance(worklog, dict):
+            continue
+        date_started = worklog.get("dateStarted")
+        time_spent = worklog.get("timeSpentSeconds")
+        if date_started is None or time_spent is None:
+            continue
+
+        extracted_date = date_started.partition("T")[0]
+        issue = worklog.get("issue")
+        summary = issue.get("summary", "") if isinstance(issue, dict) else ""
+        # Most worklogs are regular work; one C-level check rules out both leave kinds
+        if summary.startswith(LEAVE_SUMMARY_PREFIXES):
+            if summary.startswith(VACATION_SUMMARY_PREFIX):
+                time_spent = vacation_seconds
+                dopust_days.add(extracted_date)
+            else:
+                time_spent -= (time_spent / 8) * 0.5
+                sick_days.add(extracted_date)
+        if extracted_date:
+            worked_time[extracted_date] += time_spent
 
-    return worked_time, dopust_days, sick_days
+    return dict(worked_time), dopust_days, sick_days
 
 
 def compute_month_diff(year: int, month: int, worked_time: dict, day_types: dict, daily_hours: float, started_working: str | None, up_to_date: str | None = None) -> float:
     """Compute total hours difference for a single month, optionally only up to a given date."""
     total_diff = 0.0
-    for day in range(1, calendar.monthrange(year, month)[1] + 1):
-        date_str = f"{year}-{month:02d}-{day:02d}"
+    for date_str in _month_day_strs(year, month):
         if up_to_date and date_str > up_to_date:
             break
         if started_working and date_str < started_working:
@@ -144,8 +523,11 @@ def compute_month_diff(year: int, month: int, worked_time: dict, day_types: dict
     return total_diff
 
 
-def fetch_prior_months_diff(year: int, month: int, jira_username: str, daily_hours: float, started_working: str | None) -> float:
-    """Calculate accumulated difference from Jan 1st through today (or end of prior month, whichever is earlier)."""
+def fetch_prior_months_diff(year: int, month: int, jira_username: str, daily_hours: float, started_working: str | None, fetch_errors: list[str] | None = None) -> float:
+    """
+    Calculate accumulated difference from Jan 1st through today (or end of prior month, whichever is earlier).
+    Failed Jira fetches count as no data; their messages are appended to `fetch_errors` if given.
+    """
     if month <= 1:
         return 0.0
 
@@ -158,33 +540,26 @@ def fetch_prior_months_diff(year: int, month: int, jira_username: str, daily_hou
         return 0.0
 
     # Cap the API range at today or end of prior month
-    last_prior_month = month - 1
-    end_of_prior = f"{year}-{last_prior_month:02d}-{calendar.monthrange(year, last_prior_month)[1]:02d}"
+    end_of_prior = _month_day_strs(year, month - 1)[-1]
     to_date = min(end_of_prior, today_str)
 
     worked_time = {}
     day_types = {}
 
+    # Both Jira requests are independent, so issue them concurrently
+    worklogs_future = jira_executor.submit(_get_worklogs_cached, from_date, to_date, jira_username)
+    day_types_future = jira_executor.submit(_get_required_times_cached, from_date, to_date, jira_username)
+
     try:
-        worklogs = jira.tempo_timesheets_get_worklogs(
-            date_from=from_date, date_to=to_date, username=jira_username
-        )
+        worklogs = worklogs_future.result()
         worked_time, _, _ = process_worklogs(worklogs, daily_hours)
     except Exception as e:
-        print(f"Error fetching prior months worklogs: {str(e)}")
+        _report_fetch_error(fetch_errors, f"Error fetching prior months worklogs: {str(e)}")
 
     try:
-        required_times = jira.tempo_timesheets_get_required_times(
-            from_date=from_date, to_date=to_date, user_name=jira_username
-        )
-        if isinstance(required_times, list):
-            day_types = {
-                item["date"]: item["type"]
-                for item in required_times
-                if isinstance(item, dict)
-            }
+        day_types = day_types_future.result()
     except Exception as e:
-        print(f"Error fetching prior months day types: {str(e)}")
+        _report_fetch_error(fetch_errors, f"Error fetching prior months day types: {str(e)}")
 
     # Sum up month-by-month diffs, only counting days up to today
     accumulated = 0.0
@@ -194,54 +569,137 @@ def fetch_prior_months_diff(year: int, month: int, jira_username: str, daily_hou
     return accumulated
 
 
-def create_calendar_svg(year: int, month: int, jira_username: str, additional_vacation_days: set[str] | None = None, daily_hours: float = 7.5, started_working: str | None = None, prior_month_diff: float = 0.0) -> str:
-
-    from_date = f"{year}-{month:02d}-01"
-    to_date = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+def _report_fetch_error(fetch_errors: list[str] | None, message: str) -> None:
+    print(message)
+    if fetch_errors is not None:
+        fetch_errors.append(message)
+
+
+class IncompleteCalendarError(Exception):
+    """
+    Raised by render_calendar when some Jira data could not be fetched, so the
+    partial rendering is not memoized. It still carries that rendering, which the
+    caller may serve with a short cache lifetime.
+    """
+
+    def __init__(self, svg_content: bytes, etag: str, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.svg_content = svg_content
+        self.etag = etag
+
+
+@functools.lru_cache(maxsize=512)
+def render_calendar(year: int, month: int, jira_username: str, additional_vacation_days: frozenset[str], daily_hours: float, started_working: str | None, cache_bucket: tuple[bool, int]) -> tuple[bytes, str]:
+    """
+    Render the calendar SVG (UTF-8 encoded, ready to send) and its ETag, memoized on
+    the (hashable) request arguments.
+    `cache_bucket` is only part of the cache key: callers pass whether the month is over
+    and the current caching window (cache_duration, or past_cache_duration for past
+    months) so entries naturally expire when the window rolls over.
+    Raises IncompleteCalendarError instead of returning if a Jira fetch failed.
+    """
+    fetch_errors = []
+    # Start the month's own Jira requests first so they overlap with the prior months' ones
+    month_fetches = submit_month_fetches(year, month, jira_username)
+    prior_diff = fetch_prior_months_diff(year, month, jira_username, daily_hours, started_working, fetch_errors)
+    svg_content = create_calendar_svg(year, month, jira_username, additional_vacation_days, daily_hours, started_working, prior_diff, month_fetches, fetch_errors).encode("utf-8")
+    etag = f'"{hashlib.md5(svg_content).hexdigest()}"'
+    if fetch_errors:
+        raise IncompleteCalendarError(svg_content, etag, fetch_errors)
+    return svg_content, etag
+
+
+def submit_month_fetches(year: int, month: int, jira_username: str) -> tuple[Future | None, Future]:
+    """
+    Start fetching a month's worklogs and day types on the Jira pool. The worklogs
+    future is None for months in the future, which have nothing logged yet.
+    """
+    day_strs = _month_day_strs(year, month)
+    from_date = day_strs[0]
+    to_date = day_strs[-1]
+    day_types_future = jira_executor.submit(_get_required_times_cached, from_date, to_date, jira_username)
 
-    # Check if the target month is in the future - skip Jira queries if so
     today = date.today()
-    target_month_date = date(year, month, 1)
-    is_future_month = target_month_date > today.replace(day=1)
+    if date(year, month, 1) > today.replace(day=1):
+        return None, day_types_future
+    worklogs_future = jira_executor.submit(_get_worklogs_cached, from_date, to_date, jira_username)
+    return worklogs_future, day_types_future
+
+
+def create_calendar_svg(year: int, month: int, jira_username: str, additional_vacation_days: frozenset[str] = frozenset(), daily_hours: float = 7.5, started_working: str | None = None, prior_month_diff: float = 0.0, month_fetches: tuple[Future | None, Future] | None = None, fetch_errors: list[str] | None = None) -> str:
+
+    days_in_month = _monthrange(year, month)[1]
+    weeks = _monthcalendar(year, month)
+
+    month_prefix = f"{year}-{month:02d}-"
+    day_strs = _month_day_strs(year, month)
+
+    # Days before started_working are greyed out with a 0 goal. Resolve that to the
+    # first day of this month that counts, so the check is a plain int comparison.
+    first_valid_day = 1
+    if started_working:
+        started = date.fromisoformat(started_working)
+        if (started.year, started.month) == (year, month):
+            first_valid_day = started.day
+        elif (started.year, started.month) > (year, month):
+            first_valid_day = days_in_month + 1
+
+    if month_fetches is None:
+        month_fetches = submit_month_fetches(year, month, jira_username)
+    worklogs_future, day_types_future = month_fetches
 
     worked_time = {}
     dopust_days = set()
     sick_days = set()
 
-    if is_future_month:
-        pass
-    else:
+    # Future months have no worklogs to fetch
+    if worklogs_future is not None:
         try:
-            worklogs = jira.tempo_timesheets_get_worklogs(
-                date_from=from_date, date_to=to_date, username=jira_username
-            )
+            worklogs = worklogs_future.result()
             worked_time, dopust_days, sick_days = process_worklogs(worklogs, daily_hours)
         except Exception as e:
-            print(f"Error fetching worklog data: {str(e)}")
+            _report_fetch_error(fetch_errors, f"Error fetching worklog data: {str(e)}")
 
     # Add additional vacation days
-    for vacation_date in (additional_vacation_days or set()):
-        if vacation_date.startswith(f"{year}-{month:02d}"):  # Only process dates in the target month
+    for vacation_date in additional_vacation_days:
+        if vacation_date.startswith(month_prefix):  # Only process dates in the target month
             worked_time[vacation_date] = daily_hours * 3600  # daily_hours in seconds
             dopust_days.add(vacation_date)
 
     try:
-        day_types = _get_required_times_cached(from_date, to_date, jira_username)
+        day_types = day_types_future.result()
     except Exception as e:
-        print(f"Error fetching Jira data: {str(e)}")
+        _report_fetch_error(fetch_errors, f"Error fetching Jira data: {str(e)}")
         day_types = {}
 
-    # Helper function to determine if a date is a working day
-    def is_working_day(date_str: str) -> bool:
-        """Returns True if the date is a working day (not before start date, and marked as WORKING_DAY). Vacation and sick days ARE working days."""
-        # Skip if before started_working
-        if started_working and date_str < started_working:
-            return False
-        # Check if it's marked as a working day (vacation and sick days are working days)
-        return day_types.get(date_str) == "WORKING_DAY"
+    today = date.today()
+    current_month = today.replace(day=1)
+    target_month = date(year, month, 1)
+    is_past_month = target_month < current_month
+    is_current_month = (
+        target_month.year == today.year and target_month.month == today.month
+    )
+    # Number of days of the month up to and including today
+    if is_past_month:
+        elapsed_days = days_in_month
+    elif is_current_month:
+        elapsed_days = today.day
+    else:
+        # Future month - no days have passed yet
+        elapsed_days = 0
+
+    # From here on everything works on per-day lists indexed by day - 1, instead of
+    # looking ISO date strings up in the dicts and sets above
+    day_type_by_day = [day_types.get(date_str) for date_str in day_strs]
+    is_vacation = [date_str in dopust_days for date_str in day_strs]
+    is_sick = [date_str in sick_days for date_str in day_strs]
+    # Working days of the month: not before start date, and marked as WORKING_DAY.
+    # Vacation and sick days ARE working days.
+    is_working = [
+        day >= first_valid_day and day_type == "WORKING_DAY"
+        for day, day_type in enumerate(day_type_by_day, 1)
+    ]
 
-    cell_size = {"width": 80, "height": 65}
-    padding = 8
     colors = {
         "NON_WORKING_DAY": "#E0E0E0",
         "WORKING_DAY": "white", 
@@ -249,104 +707,68 @@ def create_calendar_svg(year: int, month: int, jira_username: str, additional_va
         "HOLIDAY_AND_NON_WORKING_DAY": "#E1E9EE",
     }
 
-    running_total = prior_month_diff
-    running_totals = {}
-    today_str = today.isoformat()
-    for day in range(1, calendar.monthrange(year, month)[1] + 1):
-        date_str = f"{year}-{month:02d}-{day:02d}"
-        # Only accumulate differences for days up to today
-        if date_str <= today_str:
-            day_type = day_types.get(date_str, "WORKING_DAY")
-            if started_working and date_str < started_working:
-                expected_hours = 0
-            else:
-                expected_hours = daily_hours if day_type == "WORKING_DAY" else 0
-            hours_worked = worked_time.get(date_str, 0) / 3600
-            running_total += hours_worked - expected_hours
-        running_totals[date_str] = running_total
-
-    d = draw.Drawing(
-        cell_size["width"] * 7 + padding * 2,
-        cell_size["height"] * 6 + padding * 2 + 60 + 100,
-        font_family="Arial",
-    )
-
-    month_name = calendar.month_name[month]
-    title = f"Work Hours Calendar - {month_name} {year} - {jira_username}"
-    d.append(
-        draw.Text(
-            title,
-            18,
-            padding + (cell_size["width"] * 7) / 2,
-            padding + 16,
-            text_anchor="middle",
-            font_weight="bold",
-        )
-    )
+    # Per-day hours worked and expected, indexed by day - 1
+    worked_hours = [worked_time.get(date_str, 0) / 3600 for date_str in day_strs]
+    expected_hours_by_day = [
+        0 if day < first_valid_day
+        else daily_hours if day_type in ("WORKING_DAY", None) else 0
+        for day, day_type in enumerate(day_type_by_day, 1)
+    ]
 
-    today = date.today()
-    current_month = today.replace(day=1)
-    target_month = date(year, month, 1)
-    is_past_month = target_month < current_month
-    is_current_month = (
-        target_month.year == today.year and target_month.month == today.month
+    # Running totals only accumulate differences for days up to today
+    running_totals = list(accumulate(
+        (
+            hours_worked - expected_hours if day <= elapsed_days else 0
+            for day, hours_worked, expected_hours in zip(range(1, days_in_month + 1), worked_hours, expected_hours_by_day)
+        ),
+        initial=prior_month_diff,
+    ))[1:]
+    # Overtime stars per day: 2 stars per hour (1 star per 30 minutes)
+    star_counts = [
+        int(max(0, hours_worked - expected_hours) * 2)
+        for hours_worked, expected_hours in zip(worked_hours, expected_hours_by_day)
+    ]
+    has_stars = any(star_counts)
+
+    parts = [STATIC_FRAME]
+    if sick_days or dopust_days or has_stars:
+        parts.append("<defs>")
+        if has_stars:
+            parts.append(STAR_ICON)
+        if sick_days:
+            parts.append(SICK_ICON)
+        if dopust_days:
+            parts.append(HOLIDAY_ICON)
+        parts.append("</defs>")
+
+    month_name = _month_name(month)
+    title = xml_escape(f"Work Hours Calendar - {month_name} {year} - {jira_username}")
+    parts.append(
+        f'<text x="{_fmt(PADDING + (CELL_WIDTH * 7) / 2)}" y="{PADDING + 16}" font-size="18" '
+        f'text-anchor="middle" font-weight="bold">{title}</text>'
     )
 
     # Count actual working days that have passed (for meaningful average)
-    total_hours_worked = sum(seconds / 3600 for seconds in worked_time.values())
-
-    # Determine the last day to count for average calculation
-    if is_past_month:
-        last_day_for_avg = calendar.monthrange(year, month)[1]
-    elif is_current_month:
-        last_day_for_avg = today.day
-    else:
-        # Future month - no days have passed yet
-        last_day_for_avg = 0
+    total_hours_worked = sum(worked_time.values()) / 3600
 
     # Count working days that have passed (excluding vacation and pre-start days)
-    elapsed_working_days = 0
-    today_str = today.isoformat()
-    for day in range(1, last_day_for_avg + 1):
-        date_str = f"{year}-{month:02d}-{day:02d}"
-        if is_working_day(date_str):
-            # Only count today if there are hours logged for it
-            if date_str == today_str and date_str not in worked_time:
-                continue
-            elapsed_working_days += 1
+    elapsed_working_days = sum(is_working[:elapsed_days])
+    # Only count today if there are hours logged for it
+    if is_current_month and is_working[today.day - 1] and day_strs[today.day - 1] not in worked_time:
+        elapsed_working_days -= 1
 
     avg_hours = total_hours_worked / elapsed_working_days if elapsed_working_days > 0 else 0
 
     remaining_working_days = 0
     if not is_past_month:
-        for day in range(
-            today.day if is_current_month else 1,
-            calendar.monthrange(year, month)[1] + 1,
-        ):
-            date_str = f"{year}-{month:02d}-{day:02d}"
-            if is_working_day(date_str):
-                remaining_working_days += 1
-
-    current_diff = running_total
+        remaining_working_days = sum(is_working[today.day - 1 if is_current_month else 0:])
+
+    current_diff = running_totals[-1]
     if remaining_working_days > 0:
         required_hours_per_day = (-current_diff) / remaining_working_days
     else:
         required_hours_per_day = abs(current_diff) if current_diff < 0 else 0
 
-    stats_y = padding + 35
-    card_height = 85
-
-    d.append(
-        draw.Rectangle(
-            padding,
-            stats_y,
-            cell_size["width"] * 4,
-            card_height + padding,
-            fill="white",
-            stroke="black",
-        )
-    )
-
     stats_labels = [
         "Average hours worked per day",
         "Year accumulated difference",
@@ -365,331 +787,180 @@ def create_calendar_svg(year: int, month: int, jira_username: str, additional_va
             [f"{remaining_working_days}", format_time(required_hours_per_day)]
         )
 
-    value_x = padding + (cell_size["width"] * 4 - 12)
-
-    for i, (label, value) in enumerate(zip(stats_labels, stats_values)):
-        d.append(draw.Text(label, 12, padding + 16, stats_y + 25 + i * 18))
-        d.append(
-            draw.Text(value, 12, value_x, stats_y + 25 + i * 18, text_anchor="end")
-        )
-
-    graph_x = 2 * padding + cell_size["width"] * 4 + padding * 2
-    graph_y = stats_y
-    graph_width = cell_size["width"] * 3 - padding * 3
-    graph_height = card_height + padding
-
-    d.append(
-        draw.Rectangle(
-            graph_x, graph_y, graph_width, graph_height, fill="white", stroke="black"
-        )
+    parts.extend(
+        STATS_ROW_TMPL.format(row_y=STATS_Y + 25 + i * 18, label=label, value=value)
+        for i, (label, value) in enumerate(zip(stats_labels, stats_values))
     )
 
-    max_hours = 10
-    grid_steps = 5
-    for i in range(grid_steps + 1):
-        y_pos = graph_y + graph_height - (i * graph_height / grid_steps)
-        hours = i * max_hours / grid_steps
-        d.append(
-            draw.Line(
-                graph_x,
-                y_pos,
-                graph_x + graph_width,
-                y_pos,
-                stroke="#CCCCCC",
-                stroke_width=0.5,
-            )
-        )
-        d.append(draw.Text(f"{int(hours)}h", 8, graph_x - 2, y_pos, text_anchor="end"))
-
-    target_y = graph_y + graph_height - (daily_hours / max_hours) * graph_height
-    d.append(
-        draw.Line(
-            graph_x,
-            target_y,
-            graph_x + graph_width,
-            target_y,
-            stroke="#1976D2",
-            stroke_width=1,
-        )
-    )
+    target_y = _fmt(GRAPH_Y + GRAPH_HEIGHT - (daily_hours / GRAPH_MAX_HOURS) * GRAPH_HEIGHT)
+    parts.append(LINE_TMPL.format(x1=GRAPH_X, x2=GRAPH_X + GRAPH_WIDTH, y=target_y, stroke="#1976D2", stroke_width=1))
 
-    days_in_month = calendar.monthrange(year, month)[1]
-    available_width = graph_width - 20
+    available_width = GRAPH_WIDTH - 20
     bar_spacing = 1
     bar_width = max(
         1, (available_width - (days_in_month - 1) * bar_spacing) / days_in_month
     )
 
-    def draw_stars(d, x, y, count, size=8):
-        for i in range(min(count, 5)):  # Limit to 5 stars maximum
-            star_x = x + cell_size["width"] - (size + 2) * (i + 1)
-            star_y = y + size + 2
-            
-            # Create a 5-pointed star path
-            points = []
-            for j in range(5):
-                angle = -90 + j * 72  # Start from top point
-                outer_x = star_x + size/2 * math.cos(math.radians(angle))
-                outer_y = star_y + size/2 * math.sin(math.radians(angle))
-                points.append((outer_x, outer_y))
-                
-                inner_angle = angle + 36
-                inner_x = star_x + size/4 * math.cos(math.radians(inner_angle))
-                inner_y = star_y + size/4 * math.sin(math.radians(inner_angle))
-                points.append((inner_x, inner_y))
-            
-            # Convert points to SVG path
-            path_data = f"M {points[0][0]},{points[0][1]}"
-            for px, py in points[1:]:
-                path_data += f" L {px},{py}"
-            path_data += " Z"
-            
-            d.append(draw.Path(path_data, fill="#2E7D32"))
-
-    def draw_sickness_icon(d, x, y):
-        # Position the icon on the right side of the cell, at the same height as hours
-        icon_x = x + cell_size["width"] - 32  # 32 pixels from right edge
-        icon_y = y + 24  # Align with hours text
-        
-        # Scale the icon to appropriate size (16x16)
-        scale = 0.67  # 16/24 to scale from 24x24 to 16x16
-        
-        # SVG path data for the sickness icon
-        paths = [
-            "M16.3188 4.39811C16.2142 4.63431 16.1229 4.86707 16.0449 5.0964C14.8581 4.39956 13.4757 4 12 4C8.26861 4 5.13388 6.55463 4.24939 10.0103C3.32522 10.0868 2.51988 10.5821 2.02371 11.306C2.38011 6.10691 6.71045 2 12 2C13.7733 2 15.4388 2.46156 16.8829 3.27111C16.6426 3.71554 16.4546 4.09121 16.3188 4.39811Z",
-            "M16.6694 9.62311C16.782 9.7483 16.8987 9.86257 17.0193 9.96593C16.9678 9.9932 16.915 10.0195 16.8609 10.0447C16.35 10.2824 15.6778 10.438 14.9463 10.242C14.2147 10.046 13.7104 9.57517 13.3868 9.11381C13.0676 8.65868 12.8921 8.16974 12.8252 7.82758L14.2973 7.53961C14.3274 7.69373 14.4264 7.98373 14.6149 8.25248C14.799 8.51501 15.0357 8.71304 15.3345 8.7931C15.5814 8.85925 15.8319 8.83445 16.0755 8.7475C16.2274 9.06007 16.4253 9.35194 16.6694 9.62311Z",
-            "M12 22C7.62613 22 3.90811 19.1919 2.55043 15.2802C3.07478 15.729 3.75574 16 4.50001 16C4.68514 16 4.86636 15.9832 5.04222 15.9511C6.41837 18.3693 9.01875 20 12 20C16.4183 20 20 16.4183 20 12C20 11.5146 19.9568 11.0392 19.8739 10.5776C20.4168 10.4171 20.9024 10.0989 21.3306 9.62311C21.4357 9.50632 21.5323 9.38569 21.6203 9.26122C21.8676 10.1316 22 11.0503 22 12C22 17.5228 17.5229 22 12 22Z",
-            "M9.70411 7.53961C9.67396 7.69373 9.57502 7.98373 9.38652 8.25248C9.20239 8.51501 8.96567 8.71304 8.66689 8.7931C8.36811 8.87315 8.0641 8.82001 7.77337 8.68472C7.47575 8.54623 7.24507 8.34455 7.1419 8.22615L6.01101 9.21159C6.24005 9.47444 6.63649 9.81014 7.14052 10.0447C7.65143 10.2824 8.32358 10.438 9.05512 10.242C9.78666 10.046 10.291 9.57517 10.6146 9.11381C10.9338 8.65868 11.1093 8.16974 11.1762 7.82758L9.70411 7.53961Z",
-            "M8.99481 13.4947C9.79184 12.6977 10.8728 12.2499 12 12.2499C13.1272 12.2499 14.2082 12.6977 15.0052 13.4947C15.8022 14.2917 16.25 15.3727 16.25 16.4999V17.2499H7.75001V16.4999C7.75001 16.2383 7.77413 15.9792 7.82113 15.7256L5.5016 14.7315C5.20706 14.9023 4.86495 15 4.5 15C3.39543 15 2.5 14.1046 2.5 13C2.5 11.8954 3.39543 11 4.5 11C5.59904 11 6.49103 11.8865 6.49993 12.9834L8.63815 13.8998C8.74775 13.7581 8.86677 13.6227 8.99481 13.4947ZM11.9683 15.7499C11.8933 15.4605 11.6899 15.2077 11.3939 15.0809L10.0896 14.5218C10.6018 14.0271 11.2866 13.7499 12 13.7499C12.7294 13.7499 13.4288 14.0396 13.9446 14.5554C14.2793 14.8901 14.5189 15.3024 14.6458 15.7499H11.9683Z",
-            "M19 9C18.45 9 17.9792 8.80417 17.5875 8.4125C17.1958 8.02083 17 7.55 17 7C17 6.55 17.125 6.07083 17.375 5.5625C17.625 5.05417 18.1667 4.2 19 3C19.8333 4.2 20.375 5.05417 20.625 5.5625C20.875 6.07083 21 6.55 21 7C21 7.55 20.8042 8.02083 20.4125 8.4125C20.0208 8.80417 19.55 9 19 9Z"
-        ]
-        
-        # Create a group for the icon with translation and scale
-        g = draw.Group(transform=f'translate({icon_x},{icon_y}) scale({scale})')
-        
-        # Add each path to the group
-        for path_data in paths:
-            g.append(draw.Path(path_data, fill="#9575CD"))
-        
-        # Add the group to the drawing
-        d.append(g)
-
-    def draw_holiday_icon(d, x, y):
-        # Position the icon on the right side of the cell, at the same height as hours
-        icon_x = x + cell_size["width"] - 32  # 32 pixels from right edge
-        icon_y = y + 24  # Align with hours text
-        
-        # Scale the icon to appropriate size (16x16)
-        scale = 0.33  # 16/48 to scale from 48x48 to 16x16
-        
-        # Create a group for the icon with translation and scale
-        g = draw.Group(transform=f'translate({icon_x},{icon_y}) scale({scale})')
-        
-        # SVG paths for the holiday icon
-        paths = [
-            {"d": "M4 24H7", "stroke-width": "4"},
-            {"d": "M10 10L12 12", "stroke-width": "4"},
-            {"d": "M24 4V7", "stroke-width": "4"},
-            {"d": "M14 24C14 18.4776 18.4776 14 24 14C29.5224 14 34 18.4776 34 24C34 27.3674 32.3357 30.3458 29.785 32.1578", "stroke-width": "4"},
-            {"d": "M38 10L36 12", "stroke-width": "4"},
-            {"d": "M44 24L41 24", "stroke-width": "4"},
-            {"d": "M37.9814 37.982L36.3614 36.362", "stroke-width": "4"},
-            {"d": "M23.4999 28C20.4999 28 14 28.2 14 31C14 33.8 18.6058 33.7908 20.9998 34C23 34.1747 26.4624 35.6879 25.9999 38C24.9998 43 8.99982 42 4.99994 42", "stroke-width": "4"}
-        ]
-        
-        # Add each path to the group
-        for path_data in paths:
-            path = draw.Path(path_data["d"], stroke="#1976D2", stroke_width=path_data["stroke-width"], 
-                           stroke_linecap="round", stroke_linejoin="round", fill="none")
-            g.append(path)
-        
-        # Add the group to the drawing
-        d.append(g)
+    # Running max keeps the thresholds sorted for bisect when the target lies outside
+    # [MIN_BAR_HOURS, MAX_BAR_HOURS]; the levels it skips are the ones the original
+    # comparison chain could never reach for such a target.
+    bar_thresholds = tuple(accumulate(
+        (MIN_BAR_HOURS, daily_hours - TARGET_MARGIN_HOURS, daily_hours + TARGET_MARGIN_HOURS, MAX_BAR_HOURS),
+        max,
+    ))
 
+    bar_boxes = defaultdict(list)
     for day in range(1, days_in_month + 1):
-        date_str = f"{year}-{month:02d}-{day:02d}"
-        hours = worked_time.get(date_str, 0) / 3600
-        bar_x = graph_x + 10 + (day - 1) * (bar_width + bar_spacing)
-        current_day_type = day_types.get(date_str)
+        hours = worked_hours[day - 1]
+        bar_x = GRAPH_X + 10 + (day - 1) * (bar_width + bar_spacing)
+        current_day_type = day_type_by_day[day - 1]
 
         # Grey out bars for dates before started_working
-        if started_working and date_str < started_working:
+        if day < first_valid_day:
             bar_color = "#CCCCCC"
-        elif date_str in dopust_days:
+        elif is_vacation[day - 1]:
             bar_color = "#0D47A1"  # Dark blue for annual leave
-        elif date_str in sick_days:
+        elif is_sick[day - 1]:
             bar_color = "#9575CD"  # Pale purple for sick leave
+        elif hours == 0:
+            bar_color = "#CCCCCC"
         else:
-            min_hours = 4
-            lower_margin = daily_hours - (5 / 60)  # 5 minutes below target
-            upper_margin = daily_hours + (5 / 60)  # 5 minutes above target
-
-            if hours == 0:
-                bar_color = "#CCCCCC"
-            elif hours < min_hours:
-                bar_color = "#C62828"
-            elif hours < lower_margin:
-                bar_color = "#EF6C00"
-            elif hours < upper_margin:
-                bar_color = "#1976D2"
-            elif hours < 10:
-                bar_color = "#2E7D32"
-            else:
-                bar_color = "#9C27B0"
-
+            level = bisect_right(bar_thresholds, hours)
             # If it's a holiday type with work, ensure color is at least blue
-            if (current_day_type in ["HOLIDAY", "HOLIDAY_AND_NON_WORKING_DAY", "NON_WORKING_DAY"]) and hours > 0:
-                if bar_color == "#C62828" or bar_color == "#EF6C00":
-                    bar_color = "#1976D2"
+            if current_day_type in ("HOLIDAY", "HOLIDAY_AND_NON_WORKING_DAY", "NON_WORKING_DAY"):
+                level = max(level, ON_TARGET_LEVEL)
+            bar_color = BAR_LEVEL_COLORS[level]
 
-        visible_hours = min(hours, 10)
-        bar_height = (visible_hours / max_hours) * graph_height
-        bar_y = graph_y + graph_height - bar_height
+        visible_hours = min(hours, GRAPH_MAX_HOURS)
+        bar_height = (visible_hours / GRAPH_MAX_HOURS) * GRAPH_HEIGHT
+        bar_y = GRAPH_Y + GRAPH_HEIGHT - bar_height
         
-        d.append(draw.Rectangle(bar_x, bar_y, bar_width, bar_height, fill=bar_color))
+        bar_boxes[bar_color].append(BOX_SUBPATH_TMPL.format(
+            x=_fmt(bar_x), y=_fmt(bar_y), width=_fmt(bar_width), height=_fmt(bar_height)
+        ))
 
         if day == 1 or day == days_in_month or day % 5 == 0:
-            d.append(
-                draw.Text(
-                    str(day),
-                    8,
-                    bar_x + bar_width / 2,
-                    graph_y + graph_height + 12,
-                    text_anchor="middle",
+            parts.append(
+                ANCHORED_TEXT_TMPL.format(
+                    x=_fmt(bar_x + bar_width / 2), y=GRAPH_Y + GRAPH_HEIGHT + 12, size=8, anchor="middle", text=day
                 )
             )
-
-    calendar_start_y = stats_y + card_height + padding + 30
-    for i, day in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
-        x = padding + i * cell_size["width"]
-        d.append(
-            draw.Text(
-                day,
-                14,
-                x + cell_size["width"] / 2,
-                calendar_start_y,
-                text_anchor="middle",
-            )
-        )
-
-    for row, week in enumerate(calendar.monthcalendar(year, month)):
+    parts.extend(f'<path d="{"".join(boxes)}" fill="{color}" />' for color, boxes in bar_boxes.items())
+
+    # Fixed markup of a day cell's contents (day number, hours, diff, separator and
+    # running total); only the per-day values are filled in inside the loop. The
+    # backgrounds are collected per colour and drawn, with the grid lines, underneath
+    # all cell contents.
+    cell_tmpl = (
+        '<text x="{tx}" y="{y16}" font-size="12">{day}</text>\n'
+        '<text x="{tx}" y="{y32}" font-size="10" fill="{hours_color}">{hours}</text>\n'
+        '<text x="{tx}" y="{y44}" font-size="10" fill="{diff_color}">{diff}</text>\n'
+        '<line x1="{tx}" y1="{y48}" x2="{lx2}" y2="{y48}" stroke="#666666" stroke-width="0.5" />\n'
+        '<text x="{tx}" y="{y58}" font-size="10" fill="{total_color}">{total}</text>'
+    )
+    cell_boxes = defaultdict(list)
+    cell_parts = []
+    # Called three times per day cell; a local avoids the global lookup each time
+    _format_time = format_time
+    for row, week in enumerate(weeks):
         for col, day in enumerate(week):
-            x = padding + col * cell_size["width"]
-            y = calendar_start_y + 10 + row * cell_size["height"]
-
-            if day != 0:
-                date_str = f"{year}-{month:02d}-{day:02d}"
-                # Grey out dates before started_working
-                if started_working and date_str < started_working:
-                    fill_color = "#E0E0E0"
-                else:
-                    fill_color = colors[day_types.get(date_str, "WORKING_DAY")]
-                d.append(
-                    draw.Rectangle(
-                        x,
-                        y,
-                        cell_size["width"],
-                        cell_size["height"],
-                        fill=fill_color,
-                        stroke="black",
-                    )
-                )
-                
-                # Add overtime stars
-                hours_worked = worked_time.get(date_str, 0) / 3600
-                day_type = day_types.get(date_str, "WORKING_DAY")
-                # Check if date is before started_working
-                if started_working and date_str < started_working:
-                    expected_hours = 0
-                else:
-                    expected_hours = daily_hours if day_type == "WORKING_DAY" else 0
-                overtime = max(0, hours_worked - expected_hours)
-                star_count = int(overtime * 2)  # 2 stars per hour (1 star per 30 minutes)
-                if star_count > 0:
-                    draw_stars(d, x, y, star_count)
-
-                # Add sickness icon if it's a sick day
-                if date_str in sick_days:
-                    draw_sickness_icon(d, x, y-4)
-                # Add holiday icon if it's an annual leave day
-                elif date_str in dopust_days:
-                    draw_holiday_icon(d, x, y-4)
-
-                d.append(draw.Text(str(day), 12, x + 8, y + 16))
-
-                hours_color = "#0D47A1" if date_str in dopust_days else "#9575CD" if date_str in sick_days else "black"
-                d.append(
-                    draw.Text(
-                        format_time(hours_worked), 10, x + 8, y + 32, fill=hours_color
-                    )
-                )
+            x = PADDING + col * CELL_WIDTH
+            y = CALENDAR_START_Y + 10 + row * CELL_HEIGHT
 
-                day_type = day_types.get(date_str, "WORKING_DAY")
-                # Check if date is before started_working
-                if started_working and date_str < started_working:
-                    expected_hours = 0
-                else:
-                    expected_hours = daily_hours if day_type == "WORKING_DAY" else 0
-                diff = hours_worked - expected_hours
-                diff_color = "#2E7D32" if diff >= 0 else "#C62828"
-                diff_text = format_time(diff, show_plus=True)
-                d.append(draw.Text(diff_text, 10, x + 8, y + 44, fill=diff_color))
-
-                d.append(
-                    draw.Line(
-                        x + 8,
-                        y + 48,
-                        x + 40,
-                        y + 48,
-                        stroke="#666666",
-                        stroke_width=0.5,
-                    )
+            if day == 0:
+                cell_boxes["white"].append(
+                    BOX_SUBPATH_TMPL.format(x=x, y=y, width=CELL_WIDTH, height=CELL_HEIGHT)
                 )
+                continue
 
-                if date_str in running_totals:
-                    total = running_totals[date_str]
-                    total_color = "#2E7D32" if total >= 0 else "#C62828"
-                    total_text = format_time(total, show_plus=True)
-                    d.append(draw.Text(total_text, 10, x + 8, y + 58, fill=total_color))
-
-                # Add WD indicator for working days
-                if is_working_day(date_str):
-                    # Determine opacity based on date
-                    current_date = date.fromisoformat(date_str)
-                    if current_date < today:
-                        wd_opacity = 0.5  # Past: 50% grey
-                    elif current_date == today:
-                        wd_opacity = 1.0  # Today: 100% opaque
-                    else:
-                        wd_opacity = 0.25  # Future: 25% grey
-                    d.append(draw.Text("WD", 8, x + cell_size["width"] - 4, y + cell_size["height"] - 4, fill="#666666", fill_opacity=wd_opacity, text_anchor="end", font_weight="bold"))
+            # Grey out dates before started_working
+            if day < first_valid_day:
+                fill_color = "#E0E0E0"
             else:
-                d.append(
-                    draw.Rectangle(
-                        x,
-                        y,
-                        cell_size["width"],
-                        cell_size["height"],
-                        fill="white",
-                        stroke="black",
-                    )
-                )
-
-    svg_content = d.as_svg()
+                fill_color = colors[day_type_by_day[day - 1] or "WORKING_DAY"]
+            cell_boxes[fill_color].append(
+                BOX_SUBPATH_TMPL.format(x=x, y=y, width=CELL_WIDTH, height=CELL_HEIGHT)
+            )
 
-    if svg_content is None:
-        raise ValueError("Failed to generate SVG content")
-    return svg_content
+            hours_worked = worked_hours[day - 1]
+            expected_hours = expected_hours_by_day[day - 1]
+            diff = hours_worked - expected_hours
+            total = running_totals[day - 1]
+            cell_parts.append(cell_tmpl.format(
+                tx=x + 8, lx2=x + 40,
+                y16=y + 16, y32=y + 32, y44=y + 44, y48=y + 48, y58=y + 58,
+                day=day,
+                hours_color="#0D47A1" if is_vacation[day - 1] else "#9575CD" if is_sick[day - 1] else "black",
+                hours=_format_time(hours_worked),
+                diff_color="#2E7D32" if diff >= 0 else "#C62828",
+                diff=_format_time(diff, show_plus=True),
+                total_color="#2E7D32" if total >= 0 else "#C62828",
+                total=_format_time(total, show_plus=True),
+            ))
+
+            # Add overtime stars
+            star_count = star_counts[day - 1]
+            if star_count > 0:
+                draw_stars(cell_parts, x, y, star_count, CELL_WIDTH)
+
+            # Add sickness icon if it's a sick day
+            if is_sick[day - 1]:
+                draw_sickness_icon(cell_parts, x, y-4, CELL_WIDTH)
+            # Add holiday icon if it's an annual leave day
+            elif is_vacation[day - 1]:
+                draw_holiday_icon(cell_parts, x, y-4, CELL_WIDTH)
+
+            # Add WD indicator for working days
+            if is_working[day - 1]:
+                # Determine opacity based on date
+                if is_current_month and day == today.day:
+                    wd_opacity = 1.0  # Today: 100% opaque
+                elif day <= elapsed_days:
+                    wd_opacity = 0.5  # Past: 50% grey
+                else:
+                    wd_opacity = 0.25  # Future: 25% grey
+                cell_parts.append(
+                    f'<text x="{x + CELL_WIDTH - 4}" y="{y + CELL_HEIGHT - 4}" font-size="8" fill="#666666" fill-opacity="{wd_opacity}" text-anchor="end" font-weight="bold">WD</text>'
+                )
+    parts.extend(f'<path d="{"".join(boxes)}" fill="{color}" />' for color, boxes in cell_boxes.items())
+    # Cell borders as one grid of lines, so edges shared by two cells are stroked once
+    grid_x = PADDING
+    grid_y = CALENDAR_START_Y + 10
+    grid_width = CELL_WIDTH * 7
+    grid_height = CELL_HEIGHT * len(weeks)
+    grid_path = "".join(
+        [f"M{grid_x} {grid_y + row * CELL_HEIGHT}h{grid_width}" for row in range(len(weeks) + 1)]
+        + [f"M{grid_x + col * CELL_WIDTH} {grid_y}v{grid_height}" for col in range(8)]
+    )
+    parts.append(f'<path d="{grid_path}" fill="none" stroke="black" />')
+    parts.extend(cell_parts)
+    parts.append("</svg>")
+    return "\n".join(parts)
 
 def format_time(hours: float, show_plus: bool = False) -> str:
-    sign = "-" if hours < 0 else ("+" if show_plus and hours > 0 else "")
-    total_minutes = int(abs(hours) * 60)
-    h = total_minutes // 60
-    m = total_minutes % 60
+    if hours < 0:
+        sign = "-"
+        hours = -hours
+    else:
+        sign = "+" if show_plus and hours > 0 else ""
+    h, m = divmod(int(hours * 60), 60)
     return f"{sign}{h}h {m}m"
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches our (strong) ETag. The header uses weak
+    comparison, so a W/ prefix (added e.g. by compressing proxies) is ignored, and
+    "*" matches any current representation.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
 @app.get("/calendar")
-async def get_calendar(
+def get_calendar(
     year: Annotated[int, Query(ge=2000, le=2100)],
     month: Annotated[int, Query(ge=1, le=12)],
     username: str,
@@ -697,60 +968,71 @@ async def get_calendar(
     vacationDays: Annotated[str | None, Query(description="CSV of ISO dates (YYYY-MM-DD) to be treated as vacation days")] = None,
     dailyHours: Annotated[float, Query(ge=1, le=24, description="Target daily work hours")] = 7.5,
     startedWorking: Annotated[str | None, Query(description="ISO date (YYYY-MM-DD) when work started - days before this are greyed out with 0 goal")] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ) -> Response:
-    expected_hash = generate_request_hash(year, month, username)
-    if not hmac.compare_digest(hash, expected_hash):
+    if not verify_request_hash(hash, year, month, username):
         raise HTTPException(status_code=403, detail="Invalid hash")
 
-    # Validate startedWorking date if provided
+    # Validate startedWorking date if provided, normalized to YYYY-MM-DD because the
+    # prior-months sum compares it against date strings
     if startedWorking:
         try:
-            date.fromisoformat(startedWorking)
+            startedWorking = date.fromisoformat(startedWorking).isoformat()
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format in startedWorking. Use ISO format YYYY-MM-DD")
 
-    # Check cache first
-    cache_key = f"{year}-{month}-{username}-{vacationDays or ''}-{dailyHours}-{startedWorking or ''}"
-    if cache_key in svg_cache and _is_cache_fresh(svg_cache[cache_key]["timestamp"]):
-        svg_content = svg_cache[cache_key]["svg"]
-    else:
-        # Parse vacation days if provided
-        additional_vacation_days = set()
-        if vacationDays:
-            try:
-                additional_vacation_days = set(date.strip() for date in vacationDays.split(','))
-                # Validate date format
-                for date_str in additional_vacation_days:
-                    date.fromisoformat(date_str)  # This will raise ValueError if format is invalid
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid date format in vacationDays. Use ISO format YYYY-MM-DD")
-
-        prior_diff = fetch_prior_months_diff(year, month, username, dailyHours, startedWorking)
-        svg_content = create_calendar_svg(year, month, username, additional_vacation_days, dailyHours, startedWorking, prior_diff)
-        
-        # Update cache
-        svg_cache[cache_key] = {
-            "svg": svg_content,
-            "timestamp": datetime.now()
-        }
+    # Parse vacation days if provided
+    additional_vacation_days = frozenset()
+    if vacationDays:
+        try:
+            additional_vacation_days = frozenset(date.strip() for date in vacationDays.split(','))
+            # Validate date format
+            for date_str in additional_vacation_days:
+                date.fromisoformat(date_str)  # This will raise ValueError if format is invalid
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format in vacationDays. Use ISO format YYYY-MM-DD")
+
+    # Months that are over keep their server-side rendering for longer. Browsers still
+    # revalidate after cache_duration (hours are logged late against the previous
+    # month), which the ETag below turns into a cheap 304.
+    today = date.today()
+    is_past_month = (year, month) < (today.year, today.month)
+    render_duration = past_cache_duration if is_past_month else cache_duration
+
+    render_args = (year, month, username, additional_vacation_days, dailyHours, startedWorking)
+    try:
+        if render_duration > 0:
+            svg_content, etag = render_calendar(
+                *render_args, cache_bucket=(is_past_month, int(time.monotonic() // (render_duration * 60))),
+            )
+        else:
+            # A duration of 0 turns caching off: render fresh on every request
+            svg_content, etag = render_calendar.__wrapped__(*render_args, cache_bucket=(is_past_month, 0))
+    except IncompleteCalendarError as e:
+        # Serve what we have; it wasn't memoized, so the next request retries Jira
+        svg_content, etag = e.svg_content, e.etag
 
     headers = {
         "Cache-Control": f"public, max-age={cache_duration * 60}",  # Convert minutes to seconds for HTTP header
-        "Content-Type": "image/svg+xml",
+        "ETag": etag,
     }
+    # The client already holds this exact SVG - skip sending the body again
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Type"] = "image/svg+xml"
     return Response(content=svg_content, headers=headers)
 
 
 @app.get("/vacation-grid")
-async def vacation_grid(
+def vacation_grid(
     year: Annotated[int, Query(ge=2000, le=2100)],
     username: str,
     hash: str,
     budget: Annotated[int, Query(ge=1, le=50)] = 28,
-) -> HTMLResponse:
+) -> StreamingResponse:
     # Validate hash using month=0 convention for year-wide requests
-    expected_hash = generate_request_hash(year, 0, username)
-    if not hmac.compare_digest(hash, expected_hash):
+    if not verify_request_hash(hash, year, 0, username):
         raise HTTPException(status_code=403, detail="Invalid hash")
 
     # Fetch Tempo data for the year, plus early January of the next year so
@@ -768,23 +1050,23 @@ async def vacation_grid(
     grid_data = find_vacation_grid(year, budget, day_types)
     opportunities = find_top_opportunities(year, budget, day_types)
 
-    # Generate HTML response
-    html_content = create_vacation_grid_html(year, budget, username, hash, grid_data, opportunities)
-
-    return HTMLResponse(content=html_content)
+    # Stream the HTML response row by row
+    return StreamingResponse(
+        iter_vacation_grid_html(year, budget, username, hash, grid_data, opportunities),
+        media_type="text/html",
+    )
 
 
 @app.get("/vacation-grid-detail")
-async def vacation_grid_detail(
+def vacation_grid_detail(
     year: Annotated[int, Query(ge=2000, le=2100)],
     username: str,
     hash: str,
     spent: Annotated[int, Query(ge=0, le=50)],
     off: Annotated[int, Query(ge=1)],
-) -> HTMLResponse:
+) -> StreamingResponse:
     # Validate hash using month=0 convention for year-wide requests
-    expected_hash = generate_request_hash(year, 0, username)
-    if not hmac.compare_digest(hash, expected_hash):
+    if not verify_request_hash(hash, year, 0, username):
         raise HTTPException(status_code=403, detail="Invalid hash")
 
     # Fetch Tempo data for the year, plus early January of the next year so
@@ -801,7 +1083,8 @@ async def vacation_grid_detail(
     # Find matching periods
     periods = find_periods_for_cell(year, spent, off, day_types)
 
-    # Generate HTML response
-    html_content = create_vacation_cell_detail_html(year, spent, off, username, hash, periods)
-
-    return HTMLResponse(content=html_content)
+    # Stream the HTML response row by row
+    return StreamingResponse(
+        iter_vacation_cell_detail_html(year, spent, off, username, hash, periods),
+        media_type="text/html",
+    )
@@ -1,7 +1,9 @@
+import functools
 import math
 from datetime import date, timedelta
 from html import escape
-from typing import Iterator
+from itertools import accumulate
+from typing import Iterator, NamedTuple
 
 
 # How strongly leverage (bonus free days per vacation day spent) is rewarded.
@@ -16,6 +18,56 @@ LEVERAGE_EXP = 2.0
 # count holidays correctly even when they land on a Saturday/Sunday.
 HOLIDAY_TYPES = ("HOLIDAY", "HOLIDAY_AND_NON_WORKING_DAY")
 
+# Days of context shown on each side of a period in the cell detail view, and a
+# day's opacity there by its distance from the period (index 0 = inside it):
+# context days fade from 0.5 next to the period towards 0.25.
+DETAIL_CONTEXT_DAYS = 3
+DETAIL_OPACITY_BY_DISTANCE = (1.0,) + tuple(
+    0.25 + 0.25 * (DETAIL_CONTEXT_DAYS - d) / DETAIL_CONTEXT_DAYS
+    for d in range(1, DETAIL_CONTEXT_DAYS + 1)
+)
+
+# Budget the detail view enumerates periods up to (the largest `spent` the endpoint
+# accepts). A larger budget only adds periods, leaving the others in the same order,
+# so one cached enumeration per year serves every cell.
+DETAIL_MAX_BUDGET = 50
+
+
+class Timeline(NamedTuple):
+    """
+    The extended timeline as parallel per-day columns (index i is the same day in each).
+
+    The period enumeration only ever reads `cost`, so keeping it as a flat byte
+    string rather than a field on a per-day dict keeps the hot loop to plain indexing.
+    `next_working[i]` holds the nearest working day at or after i (len(cost) if
+    none), so a period can be widened over its trailing free days with a lookup
+    instead of a scan. `holidays_upto[i]` / `bridged_upto[i]` count the (bridged)
+    holidays before day i, so a period's holidays are a subtraction. Days are
+    kept as ordinals; `date_at` builds the `date` only for the few days that are
+    actually displayed.
+    """
+    start_ordinal: int
+    types: list[str]
+    cost: bytes
+    is_working: list[bool]
+    is_weekend: list[bool]
+    next_working: list[int]
+    holidays_upto: list[int]
+    bridged_upto: list[int]
+
+    def date_at(self, i: int) -> date:
+        return date.fromordinal(self.start_ordinal + i)
+
+
+class Day(NamedTuple):
+    """One displayed day of a period, including the faded context days around it."""
+    date: date
+    is_working: bool
+    is_weekend: bool
+    day_type: str
+    in_period: bool
+    opacity: float
+
 
 def score_period(
     spent: int, off: int, holidays: int = 0,
@@ -45,97 +97,148 @@ def score_period(
     return (leverage ** leverage_exp) * free * (1 + holiday_weight * holidays)
 
 
-def _count_holidays(timeline: list[dict], start: int, end: int) -> int:
+def _count_holidays(timeline: Timeline, start: int, end: int) -> int:
     """Count all public holidays within a period, including those on weekends."""
-    return sum(1 for i in range(start, end + 1) if timeline[i]["type"] in HOLIDAY_TYPES)
+    return timeline.holidays_upto[end + 1] - timeline.holidays_upto[start]
 
 
-def _count_bridged_holidays(timeline: list[dict], start: int, end: int) -> int:
+def _count_bridged_holidays(timeline: Timeline, start: int, end: int) -> int:
     """
     Count holidays that fall on a working day (type HOLIDAY) within a period.
 
     Only these grant an extra free day you'd not otherwise have, so they -- not
     holidays that land on a weekend -- are what earns the scoring bonus.
     """
-    return sum(1 for i in range(start, end + 1) if timeline[i]["type"] == "HOLIDAY")
+    return timeline.bridged_upto[end + 1] - timeline.bridged_upto[start]
 
 
-def _get_year_timeline(year: int, day_types: dict[str, str]) -> tuple[list[dict], int]:
+@functools.lru_cache(maxsize=128)
+def _build_year_timeline(
+    year: int, today: date, day_types_key: frozenset[tuple[str, str]]
+) -> tuple[Timeline | None, int]:
     """
-    Build the extended timeline for the year.
-    Returns: (timeline_list, year_end_index)
+    Build the extended timeline for the year, starting the day after `today`.
+    Returns: (timeline, year_end_index), or (None, 0) if the year is already over
+
+    Cached, so the returned columns are shared and must not be modified.
     """
-    today = date.today()
     tomorrow = today + timedelta(days=1)
     start_date = max(tomorrow, date(year, 1, 1))
     end_date = date(year, 12, 31)
 
     if start_date > end_date:
-        return [], 0
+        return None, 0
+
+    start_ord = start_date.toordinal()
+    end_ord = date(year + 1, 1, 10).toordinal()
+    # Work on ordinals throughout: day types keyed by ordinal, and the weekday
+    # derived from the ordinal itself (ordinal 1, 0001-01-01, was a Monday).
+    type_by_ord = {date.fromisoformat(d).toordinal(): t for d, t in day_types_key}
 
-    timeline = []
-    current = start_date
-    extended_end = date(year + 1, 1, 10)
+    types = []
+    is_working = []
+    is_weekend = []
 
-    while current <= extended_end:
-        day_type = day_types.get(current.isoformat())
+    for o in range(start_ord, end_ord + 1):
+        weekend = (o - 1) % 7 >= 5
+        day_type = type_by_ord.get(o)
         if day_type is None:
-            day_type = "NON_WORKING_DAY" if current.weekday() >= 5 else "WORKING_DAY"
-
-        is_working = day_type == "WORKING_DAY"
-        timeline.append({
-            "date": current,
-            "cost": 1 if is_working else 0,
-            "type": day_type,
-            "is_working": is_working,
-            "is_weekend": current.weekday() >= 5,
-        })
-        current += timedelta(days=1)
+            day_type = "NON_WORKING_DAY" if weekend else "WORKING_DAY"
+
+        types.append(day_type)
+        is_working.append(day_type == "WORKING_DAY")
+        is_weekend.append(weekend)
 
-    try:
-        year_end_idx = next(i for i, d in enumerate(timeline) if d["date"] > end_date)
-    except StopIteration:
-        year_end_idx = len(timeline)
+    # The year always ends inside the extended range, so this is just an offset.
+    year_end_idx = end_date.toordinal() - start_ord + 1
 
+    n = len(types)
+    # One extra sentinel slot so next_working[end + 1] is valid for the last day.
+    next_working = [n] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        next_working[i] = i if is_working[i] else next_working[i + 1]
+
+    holidays_upto = list(accumulate((t in HOLIDAY_TYPES for t in types), initial=0))
+    bridged_upto = list(accumulate((t == "HOLIDAY" for t in types), initial=0))
+
+    timeline = Timeline(
+        start_ord, types, bytes(is_working), is_working, is_weekend, next_working,
+        holidays_upto, bridged_upto,
+    )
     return timeline, year_end_idx
 
 
-def _iter_vacation_periods(
-    timeline: list[dict], year_end_idx: int, max_budget: int
-) -> Iterator[tuple[int, int, int, int]]:
+def _enumerate_periods(
+    cost: bytes, next_working: list[int], year_end_idx: int, max_budget: int,
+) -> tuple[list[int], list[int], list[int], list[int]]:
     """
-    Generator that yields unique vacation periods.
-    Yields: (vacation_spent, days_off, ext_start_idx, ext_end_idx)
+    Enumerate every unique vacation period, in start-then-end order.
+    Returns parallel lists: (spent, days_off, ext_start_idx, ext_end_idx)
+
+    A period is a chosen [start, end] range widened over the free days on either
+    side. Starting on a free day widens back to the first day of that free run
+    and only reproduces periods already found from there, so only days following
+    a working day (or the first day) are used as starts. From such a start, the
+    next distinct period is always the current one plus the following working
+    day, so each start costs at most max_budget + 1 steps.
     """
-    seen = set()
+    spent_out: list[int] = []
+    off_out: list[int] = []
+    start_out: list[int] = []
+    end_out: list[int] = []
+    add_spent, add_off = spent_out.append, off_out.append
+    add_start, add_end = start_out.append, end_out.append
+
+    for ext_start in range(year_end_idx):
+        if ext_start > 0 and not cost[ext_start - 1]:
+            continue
+
+        vacation_spent = cost[ext_start]
+        end_idx = ext_start
 
-    for start_idx in range(year_end_idx):
-        vacation_spent = 0
+        while vacation_spent <= max_budget:
+            # Extend forwards to just before the next working day
+            ext_end = next_working[end_idx + 1] - 1
 
-        for end_idx in range(start_idx, year_end_idx):
-            vacation_spent += timeline[end_idx]["cost"]
+            add_spent(vacation_spent)
+            add_off(ext_end - ext_start + 1)
+            add_start(ext_start)
+            add_end(ext_end)
 
-            if vacation_spent > max_budget:
+            # Take in the working day that ended this period
+            end_idx = ext_end + 1
+            if end_idx >= year_end_idx:
                 break
+            vacation_spent += 1
 
-            # Extend backwards
-            ext_start = start_idx
-            while ext_start > 0 and timeline[ext_start - 1]["cost"] == 0:
-                ext_start -= 1
+    return spent_out, off_out, start_out, end_out
 
-            # Extend forwards
-            ext_end = end_idx
-            while ext_end < len(timeline) - 1 and timeline[ext_end + 1]["cost"] == 0:
-                ext_end += 1
 
-            period_key = (ext_start, ext_end)
-            if period_key in seen:
-                continue
+@functools.lru_cache(maxsize=32)
+def _build_year_periods(
+    year: int, today: date, day_types_key: frozenset[tuple[str, str]], max_budget: int
+) -> tuple[Timeline | None, tuple[list[int], list[int], list[int], list[int]]]:
+    """Cached `_enumerate_periods` over the year's timeline; the lists are shared, don't modify them."""
+    timeline, year_end_idx = _build_year_timeline(year, today, day_types_key)
+    if timeline is None:
+        return None, ([], [], [], [])
+    return timeline, _enumerate_periods(
+        timeline.cost, timeline.next_working, year_end_idx, max_budget,
+    )
 
-            seen.add(period_key)
-            days_off = ext_end - ext_start + 1
 
-            yield vacation_spent, days_off, ext_start, ext_end
+def _get_year_periods(
+    year: int, max_budget: int, day_types: dict[str, str]
+) -> tuple[Timeline | None, tuple[list[int], list[int], list[int], list[int]]]:
+    """
+    Timeline and unique vacation periods for the year, memoized.
+
+    Keyed on today's date as well as the inputs, since the timeline starts
+    tomorrow. Reloading the grid, or rendering the grid and its top
+    opportunities for the same request, reuses one enumeration.
+    Returns: (timeline, (spent, days_off, ext_start_idx, ext_end_idx))
+    """
+    return _build_year_periods(year, date.today(), frozenset(day_types.items()), max_budget)
 
 
 def find_vacation_grid(year: int, max_budget: int, day_types: dict[str, str]) -> dict:
@@ -144,29 +247,28 @@ def find_vacation_grid(year: int, max_budget: int, day_types: dict[str, str]) ->
     X axis: days spent (0 to max_budget)
     Y axis: days off (1 to max possible, including adjacent weekends/holidays)
     """
-    timeline, year_end_idx = _get_year_timeline(year, day_types)
-    if not timeline:
+    timeline, (spent_list, off_list, _, _) = _get_year_periods(year, max_budget, day_types)
+    if timeline is None:
         return {"grid": [], "max_days_off": 0, "max_budget": 0}
 
-    counts = {}
-    max_days_off = 0
+    max_days_off = max(off_list, default=0)
 
-    for spent, off, _, _ in _iter_vacation_periods(timeline, year_end_idx, max_budget):
-        key = (spent, off)
-        counts[key] = counts.get(key, 0) + 1
-        max_days_off = max(max_days_off, off)
+    # Count straight into a flat row-major grid: row (days_off - 1), column days_spent.
+    width = max_budget + 1
+    cells = [0] * (max_days_off * width)
+    for spent, off in zip(spent_list, off_list):
+        cells[(off - 1) * width + spent] += 1
+
+    grid = [cells[i:i + width] for i in range(0, len(cells), width)]
 
     # Highest interestingness score across all populated cells, used to
     # normalize the heatmap coloring. Computed per (spent, off) without the
     # holiday bonus so a cell's color is deterministic.
     max_score = 0.0
-    for spent, off in counts:
-        max_score = max(max_score, score_period(spent, off))
-
-    grid = []
-    for days_off in range(1, max_days_off + 1):
-        row = [counts.get((days_spent, days_off), 0) for days_spent in range(0, max_budget + 1)]
-        grid.append(row)
+    for idx, count in enumerate(cells):
+        if count:
+            off, spent = divmod(idx, width)
+            max_score = max(max_score, score_period(spent, off + 1))
 
     return {
         "grid": grid,
@@ -183,48 +285,52 @@ def find_periods_for_cell(
     Find all periods matching exact (days_spent, days_off) combination.
     Returns up to 10 periods with day details including 3 context days on each side.
     """
-    timeline, year_end_idx = _get_year_timeline(year, day_types)
-    if not timeline:
+    timeline, periods = _get_year_periods(year, max(target_spent, DETAIL_MAX_BUDGET), day_types)
+    if timeline is None:
         return []
 
+    spent_list, off_list, start_list, end_list = periods
+
+    # Pick out the first 10 matches before building any day details. Seeking
+    # with list.index skips every period of the wrong length without a Python
+    # loop iteration each.
+    hits = []
+    idx = -1
+    while len(hits) < 10:
+        try:
+            idx = off_list.index(target_off, idx + 1)
+        except ValueError:
+            break
+        if spent_list[idx] == target_spent:
+            hits.append(idx)
+
     matching = []
-    context_days = 3
-
-    for spent, off, ext_start, ext_end in _iter_vacation_periods(timeline, year_end_idx, target_spent):
-        if spent == target_spent and off == target_off:
-            # Include context days before and after
-            display_start = max(0, ext_start - context_days)
-            display_end = min(len(timeline) - 1, ext_end + context_days)
-
-            days = []
-            for i in range(display_start, display_end + 1):
-                day = timeline[i]
-                in_period = ext_start <= i <= ext_end
-                # Calculate fade: 1.0 for period days, decreasing for context
-                if in_period:
-                    opacity = 1.0
-                elif i < ext_start:
-                    opacity = 0.25 + 0.25 * (context_days - (ext_start - i)) / context_days
-                else:
-                    opacity = 0.25 + 0.25 * (context_days - (i - ext_end)) / context_days
-
-                days.append({
-                    "date": day["date"],
-                    "is_working": day["is_working"],
-                    "is_weekend": day["is_weekend"],
-                    "day_type": day["type"],
-                    "in_period": in_period,
-                    "opacity": opacity,
-                })
-
-            matching.append({
-                "start_date": timeline[ext_start]["date"],
-                "end_date": timeline[ext_end]["date"],
-                "days": days,
-            })
-
-            if len(matching) >= 10:
-                break
+    last_idx = len(timeline.cost) - 1
+
+    for idx in hits:
+        ext_start, ext_end = start_list[idx], end_list[idx]
+
+        # Include context days before and after
+        display_start = max(0, ext_start - DETAIL_CONTEXT_DAYS)
+        display_end = min(last_idx, ext_end + DETAIL_CONTEXT_DAYS)
+
+        days = [
+            Day(
+                timeline.date_at(i),
+                timeline.is_working[i],
+                timeline.is_weekend[i],
+                timeline.types[i],
+                ext_start <= i <= ext_end,
+                DETAIL_OPACITY_BY_DISTANCE[max(ext_start - i, i - ext_end, 0)],
+            )
+            for i in range(display_start, display_end + 1)
+        ]
+
+        matching.append({
+            "start_date": timeline.date_at(ext_start),
+            "end_date": timeline.date_at(ext_end),
+            "days": days,
+        })
 
     return matching
 
@@ -242,12 +348,12 @@ def find_top_opportunities(
     least `min_fraction` of the best opportunity are shown, so the panel is not
     padded with dull brute-force blocks when fewer genuinely good options exist.
     """
-    timeline, year_end_idx = _get_year_timeline(year, day_types)
-    if not timeline:
+    timeline, periods = _get_year_periods(year, max_budget, day_types)
+    if timeline is None:
         return []
 
     scored = []
-    for spent, off, ext_start, ext_end in _iter_vacation_periods(timeline, year_end_idx, max_budget):
+    for spent, off, ext_start, ext_end in zip(*periods):
         if spent <= 0:
             continue
         holidays = _count_holidays(timeline, ext_start, ext_end)
@@ -263,6 +369,7 @@ def find_top_opportunities(
     score_floor = scored[0][0] * min_fraction
 
     selected = []
+    last_idx = len(timeline.cost) - 1
     used: list[tuple[int, int]] = []
     seen_recipes: set[tuple[int, int]] = set()
     for score, spent, off, ext_start, ext_end, holidays, bridged in scored:
@@ -278,23 +385,22 @@ def find_top_opportunities(
         used.append((ext_start, ext_end))
 
         display_start = max(0, ext_start - context_days)
-        display_end = min(len(timeline) - 1, ext_end + context_days)
+        display_end = min(last_idx, ext_end + context_days)
         days = []
         for i in range(display_start, display_end + 1):
-            day = timeline[i]
             in_period = ext_start <= i <= ext_end
-            days.append({
-                "date": day["date"],
-                "is_working": day["is_working"],
-                "is_weekend": day["is_weekend"],
-                "day_type": day["type"],
-                "in_period": in_period,
-                "opacity": 1.0 if in_period else 0.35,
-            })
+            days.append(Day(
+                timeline.date_at(i),
+                timeline.is_working[i],
+                timeline.is_weekend[i],
+                timeline.types[i],
+                in_period,
+                1.0 if in_period else 0.35,
+            ))
 
         selected.append({
-            "start_date": timeline[ext_start]["date"],
-            "end_date": timeline[ext_end]["date"],
+            "start_date": timeline.date_at(ext_start),
+            "end_date": timeline.date_at(ext_end),
             "spent": spent,
             "off": off,
             "holidays": holidays,
@@ -309,67 +415,21 @@ def find_top_opportunities(
     return selected
 
 
-def _render_day_squares(days: list[dict]) -> str:
-    """Render a period's days as colored squares (shared by detail + highlight views)."""
-    squares = ""
-    for day in days:
-        in_period = day.get("in_period", True)
-        if day["is_working"]:
-            color = "#1976D2" if in_period else "#9E9E9E"
-        elif day["is_weekend"]:
-            color = "#CE93D8"
-        else:
-            color = "#81D4FA"
-
-        opacity = day.get("opacity", 1.0)
-        title = day["date"].strftime("%d %b %a")
-        if in_period and day["is_working"]:
-            title += " (vacation)"
-        squares += f'<span class="day-sq" style="background:{color};opacity:{opacity:.2f}" title="{title}"></span>'
-    return squares
-
-
-def create_vacation_cell_detail_html(
-    year: int, days_spent: int, days_off: int, username: str, hash_value: str, periods: list[dict]
-) -> str:
-    """Generate HTML page showing periods for a specific cell."""
-    rows_html = ""
-    for i, p in enumerate(periods, 1):
-        start_fmt = p["start_date"].strftime("%d %b")
-        end_fmt = p["end_date"].strftime("%d %b")
-
-        squares = _render_day_squares(p["days"])
-
-        rows_html += f"""
-            <tr>
-                <td>{i}</td>
-                <td>{start_fmt} - {end_fmt}</td>
-                <td><div class="day-squares">{squares}</div></td>
-            </tr>"""
-
-    if not periods:
-        rows_html = '<tr><td colspan="3" style="text-align:center;padding:20px;">No periods found</td></tr>'
-
-    ratio_text = f"{days_off / days_spent:.1f}x" if days_spent > 0 else "FREE"
-
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Vacation Periods - {days_spent}d spent, {days_off}d off</title>
-    <style>
-        * {{ box-sizing: border-box; }}
-        body {{
+# Stylesheets of the cell detail and grid pages; static, so kept out of the
+# per-request f-strings.
+DETAIL_PAGE_CSS = """    <style>
+        * { box-sizing: border-box; }
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
             margin: 0;
             padding: 8px;
             background: white;
             color: #333;
-        }}
-        h1 {{ font-size: 16px; margin: 0 0 4px 0; color: #1976D2; }}
-        p {{ font-size: 12px; color: #666; margin: 0 0 8px 0; }}
-        a {{ color: #1976D2; }}
-        table {{
+        }
+        h1 { font-size: 16px; margin: 0 0 4px 0; color: #1976D2; }
+        p { font-size: 12px; color: #666; margin: 0 0 8px 0; }
+        a { color: #1976D2; }
+        table {
             width: 100%;
             border-collapse: collapse;
             background: white;
@@ -377,222 +437,122 @@ def create_vacation_cell_detail_html(
             overflow: hidden;
             box-shadow: 0 1px 2px rgba(0,0,0,0.1);
             font-size: 12px;
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 6px 8px;
             text-align: left;
             border-bottom: 1px solid #eee;
-        }}
-        th {{
+        }
+        th {
             background: #1976D2;
             color: white;
             font-weight: 500;
-        }}
-        .day-squares {{
+        }
+        .day-squares {
             display: flex;
             gap: 2px;
             flex-wrap: wrap;
-        }}
-        .day-sq {{
+        }
+        .day-sq {
             width: 14px;
             height: 14px;
             border-radius: 2px;
             display: inline-block;
-        }}
-        .legend {{
+        }
+        .legend {
             display: flex;
             gap: 12px;
             margin: 8px 0;
             font-size: 10px;
-        }}
-        .legend-item {{
+        }
+        .legend-item {
             display: flex;
             align-items: center;
             gap: 4px;
-        }}
-        .legend-box {{
+        }
+        .legend-box {
             width: 12px;
             height: 12px;
             border-radius: 2px;
-        }}
-        .back {{ margin-bottom: 8px; font-size: 12px; }}
+        }
+        .back { margin-bottom: 8px; font-size: 12px; }
     </style>
-</head>
-<body>
-    <div class="back"><a href="/vacation-grid?year={year}&username={escape(username)}&hash={escape(hash_value)}">&larr; Back to grid</a></div>
-    <h1>Spend {days_spent} days, get {days_off} days off ({ratio_text})</h1>
-    <p>Showing up to 10 matching periods for {year}</p>
-
-    <div class="legend">
-        <div class="legend-item"><div class="legend-box" style="background:#1976D2"></div> Vacation day</div>
-        <div class="legend-item"><div class="legend-box" style="background:#9E9E9E"></div> Working day</div>
-        <div class="legend-item"><div class="legend-box" style="background:#CE93D8"></div> Weekend</div>
-        <div class="legend-item"><div class="legend-box" style="background:#81D4FA"></div> Holiday</div>
-    </div>
-
-    <table>
-        <thead>
-            <tr>
-                <th>#</th>
-                <th>Period</th>
-                <th>Days</th>
-            </tr>
-        </thead>
-        <tbody>{rows_html}
-        </tbody>
-    </table>
-</body>
-</html>"""
-
-    return html
-
-
-def create_vacation_grid_html(
-    year: int, budget: int, username: str, hash_value: str, grid_data: dict,
-    opportunities: list[dict] | None = None
-) -> str:
-    """Generate HTML page displaying vacation grid."""
-    grid = grid_data["grid"]
-    max_days_off = grid_data["max_days_off"]
-    max_budget = grid_data["max_budget"]
-    max_score = grid_data.get("max_score", 0.0)
-    opportunities = opportunities or []
-
-    def score_to_color(score: float) -> tuple[str, str]:
-        """Convert interestingness score to a heatmap color (log-normalized)."""
-        if max_score <= 0 or score <= 0:
-            return "hsl(30, 70%, 45%)", "white"
-        t = math.log1p(score) / math.log1p(max_score)
-        hue = 30 + t * (210 - 30)
-        return f"hsl({hue:.0f}, 70%, 45%)", "white"
-
-    rows_html = ""
-    for days_off_idx, row in enumerate(reversed(grid)):
-        days_off = max_days_off - days_off_idx
-        cells = f'<td class="axis-label">{days_off}</td>'
-        for days_spent_idx, count in enumerate(row):
-            days_spent = days_spent_idx
-            if count == 0:
-                cells += '<td class="cell empty">0</td>'
-            else:
-                score = score_period(days_spent, days_off)
-                bg, text = score_to_color(score)
-                link = f"/vacation-grid-detail?year={year}&username={escape(username)}&hash={escape(hash_value)}&spent={days_spent}&off={days_off}"
-                cells += f'<td class="cell" style="background:{bg};color:{text}"><a href="{link}">{count}</a></td>'
-        rows_html += f"<tr>{cells}</tr>\n"
-
-    # Right-side "Top opportunities" panel
-    cards_html = ""
-    for i, opp in enumerate(opportunities, 1):
-        spent, off = opp["spent"], opp["off"]
-        ratio_text = f"{off / spent:.1f}x" if spent > 0 else "FREE"
-        start_fmt = opp["start_date"].strftime("%d %b")
-        end_fmt = opp["end_date"].strftime("%d %b")
-        squares = _render_day_squares(opp["days"])
-        holiday_badge = ""
-        if opp["holidays"]:
-            n = opp["holidays"]
-            label = f'🎉 {n} holiday{"s" if n != 1 else ""}'
-            weekend = opp["weekend_holidays"]
-            if weekend:
-                label += f' ({weekend} on weekend)'
-            holiday_badge = f'<span class="badge">{label}</span>'
-        link = f"/vacation-grid-detail?year={year}&username={escape(username)}&hash={escape(hash_value)}&spent={spent}&off={off}"
-        cards_html += f"""
-            <a class="opp-card" href="{link}">
-                <div class="opp-head">
-                    <span class="opp-rank">#{i}</span>
-                    <span class="opp-headline">{spent}&rarr;{off} days <span class="opp-ratio">{ratio_text}</span></span>
-                </div>
-                <div class="opp-dates">{start_fmt} &ndash; {end_fmt} {holiday_badge}</div>
-                <div class="day-squares">{squares}</div>
-            </a>"""
-    if not opportunities:
-        cards_html = '<p style="color:#999;font-size:11px;">No opportunities found.</p>'
-
-    x_labels = '<td class="axis-label"></td>'
-    for days_spent in range(0, max_budget + 1):
-        x_labels += f'<td class="axis-label">{days_spent}</td>'
+"""
 
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Vacation Grid - {year}</title>
-    <style>
-        * {{ box-sizing: border-box; }}
-        body {{
+GRID_PAGE_CSS = """    <style>
+        * { box-sizing: border-box; }
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
             margin: 0;
             padding: 8px;
             background: white;
             color: #333;
-        }}
-        h1 {{ font-size: 16px; margin: 0 0 4px 0; color: #1976D2; }}
-        p {{ font-size: 12px; color: #666; margin: 0 0 8px 0; }}
-        .grid-container {{
+        }
+        h1 { font-size: 16px; margin: 0 0 4px 0; color: #1976D2; }
+        p { font-size: 12px; color: #666; margin: 0 0 8px 0; }
+        .grid-container {
             overflow-x: auto;
-        }}
-        table {{
+        }
+        table {
             border-collapse: collapse;
             font-size: 10px;
-        }}
-        .cell {{
+        }
+        .cell {
             width: 22px;
             height: 22px;
             text-align: center;
             vertical-align: middle;
             border: 1px solid #ddd;
-        }}
-        .empty {{ background: #f0f0f0; color: #ccc; }}
-        .cell a {{ color: inherit; text-decoration: none; display: block; }}
-        .cell a:hover {{ text-decoration: underline; }}
-        .axis-label {{
+        }
+        .empty { background: #f0f0f0; color: #ccc; }
+        .cell a { color: inherit; text-decoration: none; display: block; }
+        .cell a:hover { text-decoration: underline; }
+        .axis-label {
             font-size: 9px;
             color: #666;
             text-align: center;
             padding: 2px 4px;
             font-weight: 500;
-        }}
-        .axis-title {{
+        }
+        .axis-title {
             font-size: 11px;
             color: #333;
             margin: 4px 0;
-        }}
-        .legend {{
+        }
+        .legend {
             display: flex;
             gap: 12px;
             margin-top: 8px;
             font-size: 10px;
-        }}
-        .legend-item {{
+        }
+        .legend-item {
             display: flex;
             align-items: center;
             gap: 4px;
-        }}
-        .legend-box {{
+        }
+        .legend-box {
             width: 12px;
             height: 12px;
             border-radius: 2px;
-        }}
-        .layout {{
+        }
+        .layout {
             display: flex;
             gap: 16px;
             align-items: flex-start;
             flex-wrap: wrap;
-        }}
-        .grid-side {{ flex: 1 1 auto; min-width: 0; }}
-        .opp-side {{
+        }
+        .grid-side { flex: 1 1 auto; min-width: 0; }
+        .opp-side {
             flex: 0 0 240px;
             max-width: 100%;
-        }}
-        .opp-side h2 {{
+        }
+        .opp-side h2 {
             font-size: 14px;
             margin: 0 0 2px 0;
             color: #1976D2;
-        }}
-        .opp-sub {{ font-size: 11px; color: #999; margin: 0 0 8px 0; }}
-        .opp-card {{
+        }
+        .opp-sub { font-size: 11px; color: #999; margin: 0 0 8px 0; }
+        .opp-card {
             display: block;
             text-decoration: none;
             color: inherit;
@@ -602,14 +562,14 @@ def create_vacation_grid_html(
             padding: 8px;
             margin-bottom: 8px;
             box-shadow: 0 1px 2px rgba(0,0,0,0.06);
-        }}
-        .opp-card:hover {{ border-color: #1976D2; box-shadow: 0 2px 6px rgba(25,118,210,0.15); }}
-        .opp-head {{ display: flex; align-items: baseline; gap: 6px; }}
-        .opp-rank {{ font-size: 11px; color: #999; font-weight: 600; }}
-        .opp-headline {{ font-size: 13px; font-weight: 600; color: #333; }}
-        .opp-ratio {{ color: #1976D2; }}
-        .opp-dates {{ font-size: 11px; color: #666; margin: 2px 0 6px 0; }}
-        .badge {{
+        }
+        .opp-card:hover { border-color: #1976D2; box-shadow: 0 2px 6px rgba(25,118,210,0.15); }
+        .opp-head { display: flex; align-items: baseline; gap: 6px; }
+        .opp-rank { font-size: 11px; color: #999; font-weight: 600; }
+        .opp-headline { font-size: 13px; font-weight: 600; color: #333; }
+        .opp-ratio { color: #1976D2; }
+        .opp-dates { font-size: 11px; color: #666; margin: 2px 0 6px 0; }
+        .badge {
             display: inline-block;
             font-size: 10px;
             color: #00796B;
@@ -617,24 +577,24 @@ def create_vacation_grid_html(
             border-radius: 3px;
             padding: 1px 4px;
             margin-left: 4px;
-        }}
-        form {{
+        }
+        form {
             margin-top: 10px;
             padding: 8px;
             display: flex;
             align-items: center;
             gap: 6px;
             flex-wrap: wrap;
-        }}
-        label {{ font-size: 12px; color: #666; }}
-        input[type="number"] {{
+        }
+        label { font-size: 12px; color: #666; }
+        input[type="number"] {
             width: 50px;
             padding: 4px 6px;
             border: 1px solid #ddd;
             border-radius: 3px;
             font-size: 12px;
-        }}
-        button {{
+        }
+        button {
             padding: 4px 12px;
             background: #1976D2;
             color: white;
@@ -642,10 +602,133 @@ def create_vacation_grid_html(
             border-radius: 3px;
             cursor: pointer;
             font-size: 12px;
-        }}
-        button:hover {{ background: #1565C0; }}
+        }
+        button:hover { background: #1565C0; }
     </style>
-</head>
+"""
+
+
+@functools.lru_cache(maxsize=64)
+def _day_square_style(color: str, opacity: float) -> str:
+    """Inline style of a day square; there are only a handful of color/opacity pairs."""
+    return f"background:{color};opacity:{opacity:.2f}"
+
+
+def _render_day_squares(days: list[Day]) -> str:
+    """Render a period's days as colored squares (shared by detail + highlight views)."""
+    parts = []
+    for day in days:
+        in_period = day.in_period
+        if day.is_working:
+            color = "#1976D2" if in_period else "#9E9E9E"
+        elif day.is_weekend:
+            color = "#CE93D8"
+        else:
+            color = "#81D4FA"
+
+        title = day.date.strftime("%d %b %a")
+        if in_period and day.is_working:
+            title += " (vacation)"
+        parts.append(f'<span class="day-sq" style="{_day_square_style(color, day.opacity)}" title="{title}"></span>')
+    return "".join(parts)
+
+
+def iter_vacation_cell_detail_html(
+    year: int, days_spent: int, days_off: int, username: str, hash_value: str, periods: list[dict]
+) -> Iterator[str]:
+    """Generate HTML page showing periods for a specific cell, in chunks (one per period row)."""
+    ratio_text = f"{days_off / days_spent:.1f}x" if days_spent > 0 else "FREE"
+
+    yield f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Vacation Periods - {days_spent}d spent, {days_off}d off</title>
+""" + DETAIL_PAGE_CSS + f"""</head>
+<body>
+    <div class="back"><a href="/vacation-grid?year={year}&username={escape(username)}&hash={escape(hash_value)}">&larr; Back to grid</a></div>
+    <h1>Spend {days_spent} days, get {days_off} days off ({ratio_text})</h1>
+    <p>Showing up to 10 matching periods for {year}</p>
+
+    <div class="legend">
+        <div class="legend-item"><div class="legend-box" style="background:#1976D2"></div> Vacation day</div>
+        <div class="legend-item"><div class="legend-box" style="background:#9E9E9E"></div> Working day</div>
+        <div class="legend-item"><div class="legend-box" style="background:#CE93D8"></div> Weekend</div>
+        <div class="legend-item"><div class="legend-box" style="background:#81D4FA"></div> Holiday</div>
+    </div>
+
+    <table>
+        <thead>
+            <tr>
+                <th>#</th>
+                <th>Period</th>
+                <th>Days</th>
+            </tr>
+        </thead>
+        <tbody>"""
+
+    for i, p in enumerate(periods, 1):
+        start_fmt = p["start_date"].strftime("%d %b")
+        end_fmt = p["end_date"].strftime("%d %b")
+
+        squares = _render_day_squares(p["days"])
+
+        yield f"""
+            <tr>
+                <td>{i}</td>
+                <td>{start_fmt} - {end_fmt}</td>
+                <td><div class="day-squares">{squares}</div></td>
+            </tr>"""
+
+    if not periods:
+        yield '<tr><td colspan="3" style="text-align:center;padding:20px;">No periods found</td></tr>'
+
+    yield """
+        </tbody>
+    </table>
+</body>
+</html>"""
+
+
+def create_vacation_cell_detail_html(
+    year: int, days_spent: int, days_off: int, username: str, hash_value: str, periods: list[dict]
+) -> str:
+    """Generate HTML page showing periods for a specific cell."""
+    return "".join(iter_vacation_cell_detail_html(year, days_spent, days_off, username, hash_value, periods))
+
+
+def iter_vacation_grid_html(
+    year: int, budget: int, username: str, hash_value: str, grid_data: dict,
+    opportunities: list[dict] | None = None
+) -> Iterator[str]:
+    """Generate HTML page displaying vacation grid, in chunks (one per grid row)."""
+    grid = grid_data["grid"]
+    max_days_off = grid_data["max_days_off"]
+    max_budget = grid_data["max_budget"]
+    max_score = grid_data.get("max_score", 0.0)
+    opportunities = opportunities or []
+    user_esc = escape(username)
+    hash_esc = escape(hash_value)
+    # Shared by every populated cell and opportunity card; only spent/off vary.
+    detail_link = f"/vacation-grid-detail?year={year}&username={user_esc}&hash={hash_esc}"
+
+    # Every cell color is one of the 181 whole hues from 30 (dull) to 210.
+    palette = tuple(f"hsl({hue}, 70%, 45%)" for hue in range(30, 211))
+    log_max_score = math.log1p(max_score) if max_score > 0 else 0.0
+
+    def score_to_color(score: float) -> tuple[str, str]:
+        """Convert interestingness score to a heatmap color (log-normalized)."""
+        if log_max_score <= 0 or score <= 0:
+            return palette[0], "white"
+        t = math.log1p(score) / log_max_score
+        return palette[round(30 + t * (210 - 30)) - 30], "white"
+
+    yield f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Vacation Grid - {year}</title>
+""" + GRID_PAGE_CSS + f"""</head>
 <body>
     <h1>Vacation Possibilities Grid - {year}</h1>
     <p>Each cell shows count of vacation periods. X: days spent, Y: days off</p>
@@ -661,7 +744,59 @@ def create_vacation_grid_html(
             <div class="grid-container">
                 <table>
                     <tbody>
-                        {rows_html}
+                        """
+
+    for days_off_idx, row in enumerate(reversed(grid)):
+        days_off = max_days_off - days_off_idx
+        cells = [f'<td class="axis-label">{days_off}</td>']
+        for days_spent_idx, count in enumerate(row):
+            days_spent = days_spent_idx
+            if count == 0:
+                cells.append('<td class="cell empty">0</td>')
+            else:
+                score = score_period(days_spent, days_off)
+                bg, text = score_to_color(score)
+                cells.append(
+                    f'<td class="cell" style="background:{bg};color:{text}">'
+                    f'<a href="{detail_link}&spent={days_spent}&off={days_off}">{count}</a></td>'
+                )
+        yield f"<tr>{''.join(cells)}</tr>\n"
+
+    # Right-side "Top opportunities" panel
+    cards = []
+    for i, opp in enumerate(opportunities, 1):
+        spent, off = opp["spent"], opp["off"]
+        ratio_text = f"{off / spent:.1f}x" if spent > 0 else "FREE"
+        start_fmt = opp["start_date"].strftime("%d %b")
+        end_fmt = opp["end_date"].strftime("%d %b")
+        squares = _render_day_squares(opp["days"])
+        holiday_badge = ""
+        if opp["holidays"]:
+            n = opp["holidays"]
+            label = f'🎉 {n} holiday{"s" if n != 1 else ""}'
+            weekend = opp["weekend_holidays"]
+            if weekend:
+                label += f' ({weekend} on weekend)'
+            holiday_badge = f'<span class="badge">{label}</span>'
+        link = f"{detail_link}&spent={spent}&off={off}"
+        cards.append(f"""
+            <a class="opp-card" href="{link}">
+                <div class="opp-head">
+                    <span class="opp-rank">#{i}</span>
+                    <span class="opp-headline">{spent}&rarr;{off} days <span class="opp-ratio">{ratio_text}</span></span>
+                </div>
+                <div class="opp-dates">{start_fmt} &ndash; {end_fmt} {holiday_badge}</div>
+                <div class="day-squares">{squares}</div>
+            </a>""")
+    cards_html = "".join(cards)
+    if not opportunities:
+        cards_html = '<p style="color:#999;font-size:11px;">No opportunities found.</p>'
+
+    x_labels = '<td class="axis-label"></td>' + "".join(
+        f'<td class="axis-label">{days_spent}</td>' for days_spent in range(0, max_budget + 1)
+    )
+
+    yield f"""
                     </tbody>
                     <tfoot>
                         <tr>{x_labels}</tr>
@@ -680,8 +815,8 @@ def create_vacation_grid_html(
 
     <form method="GET">
         <input type="hidden" name="year" value="{year}">
-        <input type="hidden" name="username" value="{escape(username)}">
-        <input type="hidden" name="hash" value="{escape(hash_value)}">
+        <input type="hidden" name="username" value="{user_esc}">
+        <input type="hidden" name="hash" value="{hash_esc}">
         <label>Max budget:</label>
         <input type="number" name="budget" min="1" max="50" value="{budget}">
         <button type="submit">Recalculate</button>
@@ -689,4 +824,10 @@ def create_vacation_grid_html(
 </body>
 </html>"""
 
-    return html
+
+def create_vacation_grid_html(
+    year: int, budget: int, username: str, hash_value: str, grid_data: dict,
+    opportunities: list[dict] | None = None
+) -> str:
+    """Generate HTML page displaying vacation grid."""
+    return "".join(iter_vacation_grid_html(year, budget, username, hash_value, grid_data, opportunities))